@@ -1,19 +1,75 @@
-import sounddevice as sd
 import numpy as np
-import wave
-import io
-import requests
 import json
-from scipy.signal import resample
 import os
+import sys
 import threading
 import subprocess
-import time
 import shutil
+import re
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from synth_cache import SynthCache
+from query_cache import QueryCache
+from silence import trim_silence, find_voiced_range
+from wav_stream import WavStreamParser, decode_wav
+from buffer_pool import BufferPool
+from audio_output import AudioOutput, SinkOutput, negotiate_output_rate
+from sound_bank import SoundBank
+from speaker_catalog import SpeakerCatalog
+from resampler import resample_int16, StreamingResampler
+from backend import create_backend
+from startup import list_process_names, poll_until
+from metrics import UtteranceMetrics, MetricsRecorder
+from cancellation import CancelScope, SynthesisCancelled
+from scheduler import (
+    PriorityWorkerPool, UtteranceScheduler,
+    PRIORITY_SE, PRIORITY_SPEECH, PRIORITY_SPECULATIVE, PRIORITY_BACKGROUND, MODE_INTERRUPT
+)
+
+# Japanese sentence boundaries used to split long messages for pipelining,
+# with any closing brackets that follow them
+_SENTENCE_END = re.compile(r"[。！？!?\n]+([」』）)〕】]*)")
+_OPEN_BRACKETS = "「『（(〔【"
+
+def split_sentences(text):
+    """Splits text after 。！？ and newlines, keeping the punctuation.
+
+    Closing brackets stay with their sentence, and a quote that carries on
+    into the sentence (「はい。」と言った) is not split. Commas do not split:
+    each segment is voiced on its own, which would change the intonation
+    of ordinary sentences.
+    """
+    segments = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+        if match.group(1) and end < len(text) and not text[end].isspace() and text[end] not in _OPEN_BRACKETS:
+            continue
+        _add_segment(segments, text[start:end])
+        start = end
+    _add_segment(segments, text[start:])
+    return segments
+
+def _add_segment(segments, segment):
+    segment = segment.strip()
+    if not segment:
+        return
+    # Punctuation-only fragments have nothing to say on their own
+    if not re.search(r"[^。！？!?」』）)〕】\s]", segment):
+        if segments:
+            segments[-1] += segment
+        return
+    segments.append(segment)
 
 class VoiceVoxPlayer:
-    def __init__(self, voicevox_url="http://127.0.0.1:50021"):
+    def __init__(self, voicevox_url="http://127.0.0.1:50021", config=None):
         self.voicevox_url = voicevox_url
+        self.config = config or {}
+        # HTTP engine(s), in-process voicevox_core or the offline stand-in;
+        # built on first use (see client) so requests is not imported at startup
+        self._client = None
+        self._client_lock = threading.Lock()
+        # "backend:version", part of the cache keys (see _engine_identity)
+        self._engine_id = None
         self.output_device_index = None
         self.output_sample_rate = 48000
         
@@ -31,10 +87,103 @@ class VoiceVoxPlayer:
             os.makedirs(self.asset_dir)
 
         self._load_se_map()
+
+        # Synthesis cache (memory LRU + disk tier)
+        self.cache_dir = self.config.get("cache_dir") or os.path.join(self.asset_dir, "cache")
+        self.synth_cache = SynthCache(
+            os.path.join(self.cache_dir, "tts"),
+            max_bytes=int(self.config.get("tts_cache_mb", 64) * 1024 * 1024),
+            disk_max_bytes=int(self.config.get("tts_disk_cache_mb", 512) * 1024 * 1024)
+        )
+        # AudioQuery depends only on (text, speaker), so slider changes reuse it
+        self.query_cache = QueryCache(
+            os.path.join(self.cache_dir, "audio_query.json") if self.config.get("persist_query_cache", True) else None,
+            max_entries=int(self.config.get("query_cache_entries", 512))
+        )
+
+        # Float32 scratch buffers for resampling, sized for a typical utterance
+        self.buffer_pool = BufferPool(
+            default_frames=int(48000 * float(self.config.get("audio_buffer_seconds", 10))),
+            max_free=int(self.config.get("synthesis_workers", 2)) + 2
+        )
+
+        # Ask VOICEVOX to render at the device rate so nothing is resampled here
+        self.request_output_rate = bool(self.config.get("request_output_rate", True))
+
+        # Streamed /synthesis: playback starts while the WAV is still downloading
+        self.stream_synthesis = bool(self.config.get("stream_synthesis", False))
+
+        # Sentence pipelining: segments are synthesized ahead of playback
+        self.pipeline_enabled = self.config.get("pipeline_synthesis", True)
+
+        # Scheduler: fixed synthesis pool, ordered playback per lane
+        self._synth_pool = PriorityWorkerPool(int(self.config.get("synthesis_workers", 2)), name="voicevox-synth")
+        self.scheduler = UtteranceScheduler(self._synth_pool, max_pending=int(self.config.get("max_pending_jobs", 16)))
+        self.speech_mode = self.config.get("speech_mode", MODE_INTERRUPT)
+
+        # Synthesis work thrown away because playback was stopped or superseded
+        self.abort_stats = {"aborted": 0, "aborted_chars": 0, "by_stage": {}}
+        self._abort_lock = threading.Lock()
+
+        # Speculative synthesis of the draft being typed (opt-in)
+        self.speculative_enabled = bool(self.config.get("speculative_synthesis", False))
+        self._speculative = {}
+        self._speculative_lock = threading.Lock()
+        self.speculation_stats = {"started": 0, "cancelled": 0, "hits": 0, "misses": 0}
+
+        # Per-utterance stage timings, optional rolling JSONL log
+        metrics_log = os.path.join(self.base_dir, "metrics.jsonl") if self.config.get("metrics_log", True) else None
+        self.metrics = MetricsRecorder(metrics_log, max_bytes=int(self.config.get("metrics_log_max_kb", 1024)) * 1024)
+        self.on_metrics = None
+
+        # Speaker warm-up: models are loaded before the first line is spoken
+        self.speaker_usage_path = os.path.join(self.cache_dir, "speaker_usage.json")
+        # Last /speakers result, shown at startup until the engine answers
+        self.speaker_catalog = SpeakerCatalog(os.path.join(self.cache_dir, "speakers.json"))
+        self.speaker_usage = self._load_speaker_usage()
+        self.keepalive_interval = float(self.config.get("speaker_keepalive_interval", 60.0))
+        # Kept warm: the selected speaker plus the top-N from warm_top_speakers()
+        self._current_speaker = None
+        self._top_speakers = []
+        self._usage_dirty = False
+        self._warm_lock = threading.Lock()
+        self._keepalive_thread = None
+        self._keepalive_stop = threading.Event()
+
+        # Persistent mixer output (opened per selected device)
+        self._output = None
+        self._output_lock = threading.Lock()
+        self.audio_blocksize = int(self.config.get("audio_blocksize", 512))
+        self.audio_latency = self.config.get("audio_latency", "low")
+        # "device" (sound card), "null" or a WAV file path, for benchmarks and headless runs
+        self.audio_sink = self.config.get("audio_sink", "device")
+        self.se_gain = float(self.config.get("se_gain", 1.0))
+        self.speech_gain = float(self.config.get("speech_gain", 1.0))
+        # Silence after each utterance; None = just enough for the device buffer
+        tail_ms = self.config.get("tail_silence_ms")
+        self.tail_silence_ms = float(tail_ms) if tail_ms is not None else None
+
+        # Leading/trailing silence of VOICEVOX output is trimmed before playback
+        self.trim_enabled = bool(self.config.get("trim_silence", True))
+        self.trim_threshold_db = float(self.config.get("trim_threshold_db", -50.0))
+        self.trim_keep_ms = float(self.config.get("trim_keep_ms", 20.0))
+        # Trimmed sentences would run together; this pause goes between them
+        self.sentence_gap_ms = float(self.config.get("sentence_gap_ms", 120.0 if self.trim_enabled else 0.0))
+        pre = self.config.get("pre_phoneme_length")
+        post = self.config.get("post_phoneme_length")
+        self.pre_phoneme_length = float(pre) if pre is not None else None
+        self.post_phoneme_length = float(post) if post is not None else None
+
+        # SE bank: decoded and resampled once, memory-mapped afterwards
+        self.sound_bank = SoundBank(os.path.join(self.cache_dir, "se"), self._process_audio)
+        self._reload_sound_bank()
         
         # Paths
-        self.VOICEVOX_PATH = r"C:\Program Files\VOICEVOX\VOICEVOX.exe"
-        self.VOICEMEETER_PATH = r"C:\Program Files (x86)\VB\Voicemeeter\voicemeeter_x64.exe"
+        self.VOICEVOX_PATH = self.config.get("voicevox_path", r"C:\Program Files\VOICEVOX\VOICEVOX.exe")
+        self.VOICEMEETER_PATH = self.config.get("voicemeeter_path", r"C:\Program Files (x86)\VB\Voicemeeter\voicemeeter_x64.exe")
+        # Upper bounds for the readiness polling after launching an app
+        self.engine_start_timeout = float(self.config.get("engine_start_timeout", 60))
+        self.app_start_timeout = float(self.config.get("app_start_timeout", 15))
 
     def _load_se_map(self):
         self.se_map = {}
@@ -73,21 +222,25 @@ class VoiceVoxPlayer:
             
             self.se_map[name] = dest_path
             self._save_se_map()
+            self.sound_bank.prepare(name, dest_path)
             return True
         except Exception as e:
             print(f"Error adding SE: {e}")
             return False
 
     def remove_se(self, name):
-        """Removes an SE from the map."""
+        """Removes an SE from the map and deletes its cached PCM."""
         if name in self.se_map:
-            del self.se_map[name]
+            path = self.se_map.pop(name)
             self._save_se_map()
+            # Keep the cached PCM if another entry still uses the same file
+            self.sound_bank.remove(name, None if path in self.se_map.values() else path)
             return True
         return False
 
     def get_output_devices(self):
         """Returns a list of output devices."""
+        import sounddevice as sd
         devices = sd.query_devices()
         output_devices = []
         for i, dev in enumerate(devices):
@@ -96,172 +249,862 @@ class VoiceVoxPlayer:
         return output_devices
 
     def set_output_device(self, index):
-        """Sets the output device by index."""
+        """Sets the output device by index and reopens the output stream."""
         self.output_device_index = index
-        self.output_sample_rate = 48000 
+        self.output_sample_rate = self._negotiate_rate(index)
+
+        with self._output_lock:
+            if self._output is not None:
+                self._output.close()
+                self._output = None
+        try:
+            self._get_output()
+        except Exception as e:
+            print(f"Error opening output device: {e}")
+
+        if self.sound_bank.output_rate != self.output_sample_rate:
+            self._reload_sound_bank()
+
+    def _negotiate_rate(self, index):
+        preferred = self.config.get("output_sample_rate")
+        if self.audio_sink != "device":
+            return int(preferred or 48000)
+        try:
+            return negotiate_output_rate(index, preferred=preferred, engine_rate_matching=self.request_output_rate)
+        except Exception as e:
+            print(f"Error querying output device: {e}")
+            return 48000
+
+    def _reload_sound_bank(self):
+        """Prepares all SEs for the current output rate in the background."""
+        threading.Thread(
+            target=self.sound_bank.load_all,
+            args=(dict(self.se_map), self.output_sample_rate),
+            daemon=True
+        ).start()
+
+    def _get_output(self):
+        """Returns the mixer for the current device, opening it on first use."""
+        with self._output_lock:
+            if self._output is None:
+                if self.audio_sink == "device":
+                    output = AudioOutput(
+                        device=self.output_device_index,
+                        samplerate=self.output_sample_rate,
+                        blocksize=self.audio_blocksize,
+                        latency=self.audio_latency
+                    )
+                else:
+                    # "null" discards the mix, anything else is a WAV path to record it to
+                    output = SinkOutput(
+                        samplerate=self.output_sample_rate,
+                        blocksize=self.audio_blocksize,
+                        path=None if self.audio_sink == "null" else self.audio_sink,
+                        realtime=bool(self.config.get("audio_sink_realtime", True))
+                    )
+                output.start()
+                self._output = output
+            return self._output
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = create_backend(self.voicevox_url, self.config)
+        return self._client
+
+    def _engine_identity(self):
+        """Returns "backend:version" of what synthesizes the audio.
+
+        Both caches are kept on disk, so their keys include it: PCM and
+        AudioQuery results of the offline stand-in, or of an older engine,
+        must not be served to another backend.
+        """
+        identity = self._engine_id
+        if identity is None:
+            version = self.client.get_version()
+            identity = f"{self.client.name}:{version}"
+            # Not remembered while the engine is down; asked again next time
+            if version is not None:
+                self._engine_id = identity
+        return identity
 
     def get_speakers(self):
         """Fetches available speakers from Voicevox."""
-        try:
-            response = requests.get(f"{self.voicevox_url}/speakers", timeout=2)
-            if response.status_code == 200:
-                return response.json()
-        except requests.RequestException:
-            pass
-        return []
+        return self.client.get_speakers()
+
+    def get_cached_speakers(self):
+        """Returns the speaker list saved by the last refresh_speakers(), or None."""
+        return self.speaker_catalog.load()[1]
+
+    def refresh_speakers(self):
+        """Fetches /version and /speakers and updates the cached catalogue.
+
+        Returns (speakers, changed); speakers is None when the engine did not answer.
+        """
+        version = self.client.get_version()
+        if version is not None:
+            # A restarted or upgraded engine gets fresh cache keys from here on
+            self._engine_id = f"{self.client.name}:{version}"
+        speakers = self.client.get_speakers()
+        if not speakers:
+            return None, False
+        # Compared by content too: new voice libraries keep the engine version
+        changed = (version, speakers) != self.speaker_catalog.load()
+        if changed:
+            self.speaker_catalog.save(version, speakers)
+        return speakers, changed
+
+    def get_latency_stats(self):
+        """Returns per-endpoint HTTP latency histograms."""
+        return self.client.latency_summary()
 
     def stop(self):
-        """Stops current playback."""
-        sd.stop()
+        """Stops current playback (speech and SE) and drops queued jobs."""
+        self.scheduler.cancel_all()
+        if self._output is not None:
+            self._output.stop_group(None)
 
-    def play_se(self, name, on_start=None, on_complete=None):
-        """Plays a sound effect in a separate thread."""
-        if name in self.se_map:
-            self.stop()
-            threading.Thread(target=self._play_wave_file, args=(self.se_map[name], on_start, on_complete), daemon=True).start()
-        else:
+    def close(self):
+        """Stops playback and releases the output stream and backend connections."""
+        self.stop()
+        self._keepalive_stop.set()
+        # Usage counts are otherwise only written by the keepalive loop
+        self._save_speaker_usage()
+        # Queries learned in the last few seconds would be lost with the timer
+        self.query_cache.flush()
+        with self._output_lock:
+            if self._output is not None:
+                self._output.close()
+                self._output = None
+        if self._client is not None:
+            self._client.close()
+
+    def play_se(self, name, on_start=None, on_complete=None, mode=MODE_INTERRUPT):
+        """Schedules a sound effect. SE overlaps with speech. Returns a JobHandle."""
+        if name not in self.se_map:
             print(f"SE not found: {name}")
+            return None
 
-    def speak(self, text, speaker_id, on_start=None, on_complete=None):
-        """Synthesizes and plays speech in a separate thread."""
-        self.stop()
-        threading.Thread(target=self._synthesize_and_play, args=(text, speaker_id, on_start, on_complete), daemon=True).start()
+        metrics = UtteranceMetrics("se", name)
+
+        def prepare(job):
+            return self._prepare_se(name, metrics)
+
+        def play(job, audio):
+            self._play_voice(job, audio, "se", self.se_gain, 0, on_start, on_complete, metrics)
 
-    def _play_wave_file(self, path, on_start=None, on_complete=None):
+        return self.scheduler.submit("se", play, prepare=prepare, priority=PRIORITY_SE, mode=mode)
+
+    def speak(self, text, speaker_id, on_start=None, on_complete=None, pipelined=None, mode=None, params=None):
+        """Schedules speech synthesis and playback. Returns a JobHandle.
+
+        In pipelined mode the text is split into sentences which are synthesized
+        on the worker pool while earlier ones are already playing. params is a
+        voice parameter snapshot from plan_speech(); the current sliders are
+        used when it is None.
+        """
+        if pipelined is None:
+            pipelined = self.pipeline_enabled
+        if mode is None:
+            mode = self.speech_mode
+        if params is None:
+            params = self._voice_params()
+        self._record_speaker_use(speaker_id)
+        metrics = UtteranceMetrics("speech", text, speaker_id)
+
+        segments = split_sentences(text) if pipelined else []
+        if len(segments) > 1:
+            def prepare(job):
+                # Stage timings follow the first segment, i.e. the time-to-first-audio path
+                futures = [
+                    self._synth_pool.submit(PRIORITY_SPEECH, self._synthesize_speech, seg, speaker_id, params, job.scope, metrics if i == 0 else None)
+                    for i, seg in enumerate(segments)
+                ]
+
+                def cancel_queued():
+                    for seg, future in zip(segments, futures):
+                        if future.cancel():
+                            self._record_abort("queued", seg)
+
+                job.add_cancel_callback(cancel_queued)
+                return futures
+
+            def play(job, futures):
+                self._play_segments(job, futures, on_start, on_complete, metrics)
+        elif self.stream_synthesis and self.client.supports_streaming:
+            def prepare(job):
+                return self._prepare_stream(job, text, speaker_id, params, metrics)
+
+            def play(job, prepared):
+                if prepared is None or isinstance(prepared, np.ndarray):
+                    self._play_voice(job, prepared, "speech", self.speech_gain, self._tail_pad_frames(), on_start, on_complete, metrics)
+                else:
+                    self._play_stream(job, prepared, text, speaker_id, params, on_start, on_complete, metrics)
+        else:
+            def prepare(job):
+                return self._synthesize_speech(text, speaker_id, params, job.scope, metrics)
+
+            def play(job, audio):
+                self._play_voice(job, audio, "speech", self.speech_gain, self._tail_pad_frames(), on_start, on_complete, metrics)
+
+        return self.scheduler.submit("speech", play, prepare=prepare, priority=PRIORITY_SPEECH, mode=mode)
+
+    def plan_speech(self, text, speaker_id, pipelined=None):
+        """Returns (params, audio_keys): the voice parameter snapshot to pass to
+        speak() and the synth cache keys its PCM will be stored under."""
+        if pipelined is None:
+            pipelined = self.pipeline_enabled
+        params = self._voice_params()
+        segments = split_sentences(text) if pipelined else []
+        if len(segments) <= 1:
+            segments = [text]
+        return params, [self._cache_key(seg, speaker_id, params)[0] for seg in segments]
+
+    def replay(self, audio_keys, sample_rate, on_start=None, on_complete=None, mode=None):
+        """Plays a past utterance from the synth cache without synthesizing.
+
+        Returns a JobHandle, or None when a segment is no longer cached.
+        PCM stored at another rate than the current output is resampled.
+        """
+        if not audio_keys or not all(self.synth_cache.contains(key) for key in audio_keys):
+            return None
+        if mode is None:
+            mode = self.speech_mode
+
+        def prepare(job):
+            segments = []
+            for key in audio_keys:
+                audio = self.synth_cache.get(key)
+                if audio is None:
+                    return None
+                if sample_rate and sample_rate != self.output_sample_rate:
+                    audio = resample_int16(audio, sample_rate, self.output_sample_rate, self.buffer_pool)
+                segments.append(audio)
+            if len(segments) > 1 and self.sentence_gap_ms > 0:
+                gap = np.zeros((int(self.output_sample_rate * self.sentence_gap_ms / 1000.0), segments[0].shape[1]), dtype=np.int16)
+                segments = [part for audio in segments for part in (gap, audio)][1:]
+            return np.concatenate(segments) if len(segments) > 1 else segments[0]
+
+        def play(job, audio):
+            self._play_voice(job, audio, "speech", self.speech_gain, self._tail_pad_frames(), on_start, on_complete)
+
+        return self.scheduler.submit("speech", play, prepare=prepare, priority=PRIORITY_SPEECH, mode=mode)
+
+    def speculate(self, text, speaker_id):
+        """Starts synthesizing a draft in the background so speak() can play it at once.
+
+        The draft is split the same way speak() would split it. Jobs for
+        segments that are no longer part of the draft (or were made with other
+        voice parameters) are cancelled. An empty draft changes nothing: it
+        usually means the text was just sent, and its segments are still
+        being claimed by speak().
+        """
+        if not self.speculative_enabled or not text.strip():
+            return
+        params = self._voice_params()
+        segments = split_sentences(text) if self.pipeline_enabled else []
+        if len(segments) <= 1:
+            segments = [text]
+        wanted = {SynthCache.make_key(seg, speaker_id, *params): seg for seg in segments}
+
+        with self._speculative_lock:
+            stale = [self._speculative.pop(key) for key in list(self._speculative) if key not in wanted]
+            for key, seg in wanted.items():
+                if key in self._speculative:
+                    continue
+                scope = CancelScope()
+                future = self._synth_pool.submit(PRIORITY_SPECULATIVE, self._speculate_now, seg, speaker_id, params, scope)
+                self._speculative[key] = (future, scope)
+                self.speculation_stats["started"] += 1
+
+        for future, scope in stale:
+            if not future.done():
+                future.cancel()
+                scope.cancel()
+                with self._speculative_lock:
+                    self.speculation_stats["cancelled"] += 1
+
+    def get_speculation_stats(self):
+        """Returns speculative job counters and hit_rate: the share of spoken
+        segments not already in the synth cache that speculation served."""
+        with self._speculative_lock:
+            stats = dict(self.speculation_stats)
+        claimed = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / claimed if claimed else 0.0
+        return stats
+
+    def _speculate_now(self, text, speaker_id, params, scope):
+        """Returns (audio, query) for a draft segment without caching either.
+
+        query is the AudioQuery fetched for it (None if it was cached).
+        Drafts are mostly prefixes that are never sent, so they are only
+        stored once _claim_speculation() uses them.
+        """
+        learned = []
         try:
-            with wave.open(path, 'rb') as wf:
-                rate = wf.getframerate()
-                channels = wf.getnchannels()
-                frames = wf.readframes(wf.getnframes())
-                audio = np.frombuffer(frames, dtype=np.int16)
-                
-                audio = self._process_audio(audio, channels, rate)
-                
-                if on_start:
-                    on_start()
-                
-                sd.play(audio, samplerate=self.output_sample_rate, device=self.output_device_index)
-                sd.wait()
-                
-                if on_complete:
-                    on_complete()
+            audio = self._synthesize(text, speaker_id, params, scope, learned=learned)
+        except SynthesisCancelled:
+            return None, None
         except Exception as e:
-            print(f"Error playing SE: {e}")
-            if on_complete:
-                on_complete()
+            print(f"Error in speculative TTS: {e}")
+            return None, None
+        return audio, learned[0] if learned else None
 
-    def _synthesize_and_play(self, text, speaker_id, on_start=None, on_complete=None):
+    def _claim_speculation(self, text, speaker_id, params, scope=None):
+        """Takes over a speculative job for text, waiting for it if still running."""
+        if not self.speculative_enabled:
+            return None
+        key = SynthCache.make_key(text, speaker_id, *params)
+        with self._speculative_lock:
+            entry = self._speculative.pop(key, None)
+        if entry is None:
+            # Not a miss when the synth cache serves it anyway
+            if not self.synth_cache.contains(self._cache_key(text, speaker_id, params)[0]):
+                with self._speculative_lock:
+                    self.speculation_stats["misses"] += 1
+            return None
+
+        future, spec_scope = entry
+        # Still queued: run it here at speech priority instead of waiting
+        # behind other work (waiting could also starve the pool)
+        if future.cancel():
+            with self._speculative_lock:
+                self.speculation_stats["misses"] += 1
+            return None
+        unregister = scope.add_callback(spec_scope.cancel) if scope is not None else None
         try:
-            # Audio Query
-            query_res = requests.post(
-                f"{self.voicevox_url}/audio_query",
-                params={"text": text, "speaker": speaker_id},
-                timeout=10
-            )
-            if query_res.status_code != 200:
-                print(f"Voicevox Query Error: {query_res.text}")
-                if on_complete: on_complete()
+            audio, query = future.result()
+        except CancelledError:
+            audio = query = None
+        finally:
+            if unregister is not None:
+                unregister()
+        with self._speculative_lock:
+            self.speculation_stats["hits" if audio is not None else "misses"] += 1
+        if audio is not None:
+            # Being spoken now: keep it like any other synthesis
+            self.synth_cache.put(self._cache_key(text, speaker_id, params)[0], audio)
+            if query is not None:
+                self.query_cache.put(text, speaker_id, query, self._engine_identity())
+        return audio
+
+    def _synthesize_speech(self, text, speaker_id, params, scope=None, metrics=None):
+        audio = self._claim_speculation(text, speaker_id, params, scope)
+        if audio is not None:
+            if metrics is not None:
+                metrics.speculative_hit = True
+                metrics.mark("resample_done")
+            return audio
+        return self._synthesize_safe(text, speaker_id, params, scope, metrics)
+
+    def warm_speaker(self, speaker_id):
+        """Loads the selected speaker's model in the background and keeps it loaded.
+
+        It replaces the previously selected one in the keepalive, so
+        browsing through speakers does not keep all of them loaded.
+        """
+        with self._warm_lock:
+            self._current_speaker = speaker_id
+            self._start_keepalive()
+        return self._synth_pool.submit(PRIORITY_BACKGROUND, self._warm_speaker_now, speaker_id)
+
+    def warm_top_speakers(self, count):
+        """Warms the most-used speakers from the usage history and keeps them loaded."""
+        ranked = sorted(self.speaker_usage.items(), key=lambda item: item[1], reverse=True)
+        top = [int(speaker_id) for speaker_id, _ in ranked[:count]]
+        with self._warm_lock:
+            self._top_speakers = top
+            if top:
+                self._start_keepalive()
+        for speaker_id in top:
+            self._synth_pool.submit(PRIORITY_BACKGROUND, self._warm_speaker_now, speaker_id)
+
+    def _start_keepalive(self):
+        # Caller holds _warm_lock
+        if self._keepalive_thread is None:
+            self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+            self._keepalive_thread.start()
+
+    def _warm_speaker_now(self, speaker_id):
+        try:
+            if self.client.is_initialized_speaker(speaker_id):
+                return True
+            return self.client.initialize_speaker(speaker_id)
+        except Exception as e:
+            print(f"Error warming speaker {speaker_id}: {e}")
+            return False
+
+    def _keepalive_loop(self):
+        # Re-initialize if the engine was restarted or evicted a model
+        while not self._keepalive_stop.wait(self.keepalive_interval):
+            with self._warm_lock:
+                speakers = list(self._top_speakers)
+                if self._current_speaker is not None and self._current_speaker not in speakers:
+                    speakers.append(self._current_speaker)
+            for speaker_id in speakers:
+                self._synth_pool.submit(PRIORITY_BACKGROUND, self._warm_speaker_now, speaker_id)
+            self._save_speaker_usage()
+
+    def _record_speaker_use(self, speaker_id):
+        key = str(speaker_id)
+        with self._warm_lock:
+            self.speaker_usage[key] = self.speaker_usage.get(key, 0) + 1
+            self._usage_dirty = True
+
+    def _load_speaker_usage(self):
+        if os.path.exists(self.speaker_usage_path):
+            try:
+                with open(self.speaker_usage_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading speaker usage: {e}")
+        return {}
+
+    def _save_speaker_usage(self):
+        with self._warm_lock:
+            if not self._usage_dirty:
                 return
-            
-            query = query_res.json()
-            
-            # Apply Voice Parameters
-            query["speedScale"] = self.speed_scale
-            query["volumeScale"] = self.volume_scale
-            query["pitchScale"] = self.pitch_scale
-
-            # Synthesis
-            audio_res = requests.post(
-                f"{self.voicevox_url}/synthesis",
-                params={"speaker": speaker_id},
-                data=json.dumps(query),
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            if audio_res.status_code != 200:
-                print(f"Voicevox Synthesis Error: {audio_res.text}")
-                if on_complete: on_complete()
+            usage = dict(self.speaker_usage)
+            self._usage_dirty = False
+        try:
+            with open(self.speaker_usage_path, 'w', encoding='utf-8') as f:
+                json.dump(usage, f)
+        except Exception as e:
+            print(f"Error saving speaker usage: {e}")
+
+    def _voice_params(self):
+        """Snapshot of the parameters a synthesis depends on."""
+        return (
+            self.speed_scale, self.volume_scale, self.pitch_scale, self.output_sample_rate,
+            self.pre_phoneme_length, self.post_phoneme_length
+        )
+
+    def _tail_pad_frames(self):
+        if self.tail_silence_ms is not None:
+            return int(self.output_sample_rate * self.tail_silence_ms / 1000.0)
+        output = self._output
+        return output.latency_frames() if output is not None else self.audio_blocksize
+
+    def get_metrics_summary(self, kind="speech"):
+        """Returns p50/p95/p99 of time-to-first-audio and end-to-end latency."""
+        return self.metrics.summary(kind=kind)
+
+    def _emit_metrics(self, metrics, job, voice):
+        if voice is not None and voice.started_at is not None:
+            metrics.mark("first_sample", voice.started_at)
+        metrics.mark("playback_end")
+        metrics.status = "cancelled" if job.cancelled else "done"
+        record = self.metrics.record(metrics)
+        if self.on_metrics:
+            try:
+                self.on_metrics(record)
+            except Exception as e:
+                print(f"Error in metrics callback: {e}")
+
+    def _prepare_se(self, name, metrics=None):
+        audio = self.sound_bank.get(name)
+        if audio is None:
+            # Not prepared yet (bank still loading or rate just changed)
+            audio = self.sound_bank.prepare(name, self.se_map[name])
+        elif metrics is not None:
+            metrics.cache_hit = True
+        if metrics is not None:
+            metrics.mark("resample_done")
+        return audio
+
+    def _play_voice(self, job, audio, group, gain, pad_frames, on_start=None, on_complete=None, metrics=None):
+        voice = None
+        try:
+            if audio is None:
                 return
+            # Trailing silence is played by the mixer, no concatenation needed
+            voice = self._get_output().play(audio, group, gain=gain, pad_frames=pad_frames)
+            job.add_cancel_callback(voice.stop)
+            if metrics is not None:
+                metrics.audio_seconds = len(audio) / self.output_sample_rate
 
-            with wave.open(io.BytesIO(audio_res.content), 'rb') as wf:
-                original_rate = wf.getframerate()
-                channels = wf.getnchannels()
-                frames = wf.readframes(wf.getnframes())
-                audio = np.frombuffer(frames, dtype=np.int16)
-
-                audio = self._process_audio(audio, channels, original_rate)
-                
-                # Add 1 second of silence
-                silence_duration = 1.0
-                silence_samples = int(self.output_sample_rate * silence_duration)
-                if channels == 2:
-                    silence = np.zeros((silence_samples, 2), dtype=np.int16)
-                else:
-                    silence = np.zeros((silence_samples, 1), dtype=np.int16)
-                
-                audio = np.concatenate([audio, silence])
+            if on_start:
+                on_start()
+            voice.wait()
+        except Exception as e:
+            print(f"Error playing {group}: {e}")
+        finally:
+            if metrics is not None and audio is not None:
+                self._emit_metrics(metrics, job, voice)
+            if on_complete:
+                on_complete()
+
+    def _play_segments(self, job, futures, on_start=None, on_complete=None, metrics=None):
+        voice = None
+        gap = None
+        try:
+            for future in futures:
+                audio = future.result()
+                if job.cancelled:
+                    break
+                if audio is None:
+                    continue
+
+                if voice is None:
+                    # One voice for the whole utterance keeps segments gapless
+                    voice = self._get_output().open_voice(audio.shape[1], "speech", gain=self.speech_gain)
+                    job.add_cancel_callback(voice.stop)
+                    if on_start:
+                        on_start()
+
+                elif self.sentence_gap_ms > 0:
+                    if gap is None:
+                        gap = np.zeros((int(self.output_sample_rate * self.sentence_gap_ms / 1000.0), audio.shape[1]), dtype=np.int16)
+                    if not voice.write(gap):
+                        break
+
+                if metrics is not None:
+                    metrics.audio_seconds += len(audio) / self.output_sample_rate
+                if not voice.write(audio):
+                    break
+
+            if voice is not None:
+                voice.close(pad_frames=self._tail_pad_frames())
+                voice.wait()
+
+        except CancelledError:
+            pass
+        except Exception as e:
+            print(f"Error in TTS: {e}")
+            if voice is not None:
+                voice.stop()
+        finally:
+            for future in futures:
+                future.cancel()
+            if metrics is not None and voice is not None:
+                self._emit_metrics(metrics, job, voice)
+            if on_complete:
+                on_complete()
+
+    def _prepare_stream(self, job, text, speaker_id, params, metrics):
+        """Returns cached/speculative PCM, or an open SynthesisStream for the lane to play."""
+        audio = self._claim_speculation(text, speaker_id, params, job.scope)
+        if audio is not None:
+            metrics.speculative_hit = True
+            metrics.mark("resample_done")
+            return audio
+
+        key, _ = self._cache_key(text, speaker_id, params)
+        audio = self.synth_cache.get(key)
+        if audio is not None:
+            metrics.cache_hit = True
+            metrics.mark("resample_done")
+            return audio
+
+        try:
+            query = self._build_query(text, speaker_id, params, job.scope, metrics)
+            if query is None:
+                return None
+            stream = self.client.synthesis_stream(query, speaker_id, job.scope)
+        except SynthesisCancelled as e:
+            self._record_abort(e.stage, text)
+            return None
+        except Exception as e:
+            print(f"Error in TTS: {e}")
+            return None
+        if stream is not None:
+            metrics.mark("synthesis_done")
+            # Never played if the job is cancelled while queued
+            job.add_cancel_callback(stream.close)
+        return stream
 
+    def _play_stream(self, job, stream, text, speaker_id, params, on_start=None, on_complete=None, metrics=None):
+        """Decodes, resamples and plays a streamed WAV block by block."""
+        key, trim = self._cache_key(text, speaker_id, params)
+        output_rate = params[3]
+        parser = WavStreamParser()
+        resampler = None
+        blocks = []
+        lead_in = trim is not None
+        voice = None
+        completed = False
+
+        def write(audio):
+            nonlocal voice, lead_in
+            blocks.append(audio)
+            if lead_in:
+                # Leading silence is dropped live; the cached copy is trimmed at both ends
+                start, end = find_voiced_range(audio, output_rate, self.trim_threshold_db)
+                if end <= start:
+                    return True
+                audio = audio[max(0, start - int(output_rate * self.trim_keep_ms / 1000.0)):]
+                lead_in = False
+            if not len(audio):
+                return True
+            if voice is None:
+                voice = self._get_output().open_voice(audio.shape[1], "speech", gain=self.speech_gain)
+                job.add_cancel_callback(voice.stop)
                 if on_start:
                     on_start()
+            if metrics is not None:
+                metrics.audio_seconds += len(audio) / output_rate
+            return voice.write(audio)
+
+        try:
+            for chunk in stream:
+                frames = parser.feed(chunk)
+                if frames is None or not len(frames):
+                    continue
+                if resampler is None:
+                    resampler = StreamingResampler(parser.rate, output_rate, parser.channels)
+                if metrics is not None:
+                    metrics.mark("decode_done")
+                audio = resampler.process_int16(frames)
+                if metrics is not None:
+                    metrics.mark("resample_done")
+                if job.cancelled or not write(audio):
+                    break
+            else:
+                if resampler is not None:
+                    completed = write(resampler.flush_int16())
+
+            if voice is not None:
+                voice.close(pad_frames=self._tail_pad_frames())
+                voice.wait()
 
-                sd.play(audio, samplerate=self.output_sample_rate, device=self.output_device_index)
-                sd.wait()
-                
-                if on_complete:
-                    on_complete()
+            if completed and not job.cancelled and blocks:
+                audio = np.concatenate(blocks)
+                if trim is not None:
+                    audio = trim_silence(audio, output_rate, self.trim_threshold_db, self.trim_keep_ms)
+                self.synth_cache.put(key, audio)
 
+        except SynthesisCancelled as e:
+            self._record_abort(e.stage, text)
         except Exception as e:
             print(f"Error in TTS: {e}")
+            if voice is not None:
+                voice.stop()
+        finally:
+            stream.close()
+            if metrics is not None and voice is not None:
+                self._emit_metrics(metrics, job, voice)
             if on_complete:
                 on_complete()
 
-    def _process_audio(self, audio, channels, input_rate):
+    def get_cache_stats(self):
+        """Returns hit/miss/eviction counters of the synthesis and AudioQuery caches."""
+        return {**self.synth_cache.stats(), "query": self.query_cache.stats()}
+
+    def get_abort_stats(self):
+        """Returns how much synthesis work was aborted, by pipeline stage."""
+        with self._abort_lock:
+            return {**self.abort_stats, "by_stage": dict(self.abort_stats["by_stage"])}
+
+    def _record_abort(self, stage, text):
+        with self._abort_lock:
+            self.abort_stats["aborted"] += 1
+            self.abort_stats["aborted_chars"] += len(text)
+            by_stage = self.abort_stats["by_stage"]
+            by_stage[stage] = by_stage.get(stage, 0) + 1
+
+    def synthesize(self, text, speaker_id, params=None):
+        """Returns int16 PCM for text without playing it, or None on failure.
+
+        params is a voice parameter tuple as from plan_speech(); the current
+        sliders and output rate are used when it is None.
+        """
+        return self._synthesize_safe(text, speaker_id, params)
+
+    def _synthesize_safe(self, text, speaker_id, params=None, scope=None, metrics=None):
+        try:
+            return self._synthesize(text, speaker_id, params, scope, metrics)
+        except SynthesisCancelled as e:
+            self._record_abort(e.stage, text)
+            return None
+        except Exception as e:
+            print(f"Error in TTS: {e}")
+            return None
+
+    def _synthesize(self, text, speaker_id, params=None, scope=None, metrics=None, learned=None):
+        """Returns processed int16 PCM for text, served from the cache when possible.
+
+        Raises SynthesisCancelled as soon as scope is cancelled; in-flight
+        requests are aborted and decode/resample are skipped. With a learned
+        list nothing is written to the caches; a fetched AudioQuery is
+        appended to it instead.
+        """
+        if params is None:
+            params = self._voice_params()
+        output_rate = params[3]
+        key, trim = self._cache_key(text, speaker_id, params)
+        audio = self.synth_cache.get(key)
+        if audio is not None:
+            if metrics is not None:
+                metrics.cache_hit = True
+                metrics.mark("resample_done")
+            return audio
+
+        query = self._build_query(text, speaker_id, params, scope, metrics, learned)
+        if query is None:
+            return None
+
+        # Synthesis
+        wav_bytes = self.client.synthesis(query, speaker_id, scope)
+        if wav_bytes is None:
+            return None
+        if scope is not None:
+            scope.check("decode")
+        if metrics is not None:
+            metrics.mark("synthesis_done")
+
+        # A view into the response body, the samples are not copied
+        audio, original_rate, channels = decode_wav(wav_bytes)
+        if metrics is not None:
+            metrics.mark("decode_done")
+
+        # Resample to the rate captured in the cache key
+        audio = self._process_audio(audio, channels, original_rate, output_rate)
+        if trim is not None:
+            audio = trim_silence(audio, output_rate, self.trim_threshold_db, self.trim_keep_ms)
+        if metrics is not None:
+            metrics.mark("resample_done")
+        if learned is None:
+            self.synth_cache.put(key, audio)
+        return audio
+
+    def _cache_key(self, text, speaker_id, params):
+        """Returns (synth cache key, trim settings or None) for a voice parameter snapshot."""
+        trim = (self.trim_threshold_db, self.trim_keep_ms) if self.trim_enabled else None
+        return SynthCache.make_key(self._engine_identity(), text, speaker_id, *params, trim), trim
+
+    def _build_query(self, text, speaker_id, params, scope=None, metrics=None, learned=None):
+        """Returns the AudioQuery for text with the voice parameters applied, or None.
+
+        A newly fetched query goes to the query cache, or to learned if given.
+        """
+        speed_scale, volume_scale, pitch_scale, output_rate, pre_phoneme, post_phoneme = params
+        if scope is not None:
+            scope.check("queued")
+
+        # Audio Query (cached per text, speaker and engine)
+        engine = self._engine_identity()
+        query = self.query_cache.get(text, speaker_id, engine)
+        if query is None:
+            query = self.client.audio_query(text, speaker_id, scope)
+            if query is None:
+                return None
+            if learned is None:
+                self.query_cache.put(text, speaker_id, query, engine)
+            else:
+                learned.append(dict(query))
+        if metrics is not None:
+            metrics.mark("query_done")
+
+        # Apply Voice Parameters
+        query["speedScale"] = speed_scale
+        query["volumeScale"] = volume_scale
+        query["pitchScale"] = pitch_scale
+        if pre_phoneme is not None:
+            query["prePhonemeLength"] = pre_phoneme
+        if post_phoneme is not None:
+            query["postPhonemeLength"] = post_phoneme
+        if self.request_output_rate:
+            query["outputSamplingRate"] = output_rate
+        return query
+
+    def _process_audio(self, audio, channels, input_rate, output_rate=None):
+        if output_rate is None:
+            output_rate = self.output_sample_rate
+
         # Reshape
         if channels == 2:
             audio = audio.reshape(-1, 2)
         else:
             audio = audio.reshape(-1, 1)
 
-        # Resample if needed
-        if input_rate != self.output_sample_rate:
-            num_samples = int(len(audio) * self.output_sample_rate / input_rate)
-            audio = resample(audio, num_samples)
-            audio = np.clip(audio, -32768, 32767).astype(np.int16)
+        # Resample if needed (float32 work buffer comes from the pool)
+        if input_rate != output_rate:
+            audio = resample_int16(audio, input_rate, output_rate, self.buffer_pool)
         
         return audio
 
-    def is_process_running(self, process_name):
-        try:
-            # Simple check using tasklist
-            output = subprocess.check_output('tasklist', shell=True).decode('shift_jis', errors='ignore')
-            return process_name.lower() in output.lower()
-        except:
-            return False
+    def is_process_running(self, process_name, running=None):
+        """running: a list_process_names() snapshot to reuse across checks."""
+        if running is None:
+            running = list_process_names()
+        return process_name.lower() in running
+
+    def wait_for_engine(self, timeout=None):
+        """Polls /version with backoff until the engine answers. Returns True when ready."""
+        if timeout is None:
+            timeout = self.engine_start_timeout
+        return poll_until(lambda: self.client.get_version() is not None, timeout)
 
-    def check_and_launch_apps(self, ask_permission_callback):
+    def _wait_for_process(self, exes):
+        return poll_until(lambda: any(self.is_process_running(exe) for exe in exes), self.app_start_timeout)
+
+    def check_and_launch_apps(self, ask_permission_callback, on_ready=None):
         """
         Checks for Voicevox and Voicemeeter.
         ask_permission_callback(app_name) -> bool
+        on_ready(app_name) is called as soon as each app is usable, so work
+        that only needs one of them can start early.
         Returns True if all good, False if failed/cancelled.
         """
-        apps = [
-            ("VOICEVOX", "VOICEVOX.exe", self.VOICEVOX_PATH),
-            ("Voicemeeter", "voicemeeter_x64.exe", self.VOICEMEETER_PATH) # Check x64
-        ]
-        
-        for name, exe, path in apps:
-            if not self.is_process_running(exe):
-                if name == "Voicemeeter" and self.is_process_running("voicemeeter.exe"):
+        def ready(name):
+            if on_ready:
+                on_ready(name)
+
+        apps = [("VOICEVOX", ("VOICEVOX.exe", "voicevox"), self.VOICEVOX_PATH)]
+        if sys.platform == "win32":
+            apps.append(("Voicemeeter", ("voicemeeter_x64.exe", "voicemeeter.exe"), self.VOICEMEETER_PATH))
+        check_engine = self.client.name == "http"
+        if not check_engine:
+            # The engine app is not needed when synthesizing in-process
+            apps = apps[1:]
+            ready("VOICEVOX")
+
+        # Process list and engine check run side by side
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            running_future = pool.submit(list_process_names)
+            version_future = pool.submit(self.client.get_version) if check_engine else None
+            running = running_future.result()
+            engine_up = version_future is not None and version_future.result() is not None
+
+        waits = []
+        for name, exes, path in apps:
+            if name == "VOICEVOX":
+                wait = self.wait_for_engine
+                if engine_up:
+                    ready(name)
                     continue
+            else:
+                wait = lambda exes=exes: self._wait_for_process(exes)
 
-                if ask_permission_callback(name):
-                    try:
-                        subprocess.Popen(path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                        wait_time = 15 if name == "VOICEVOX" else 5
-                        time.sleep(wait_time) 
-                    except Exception as e:
-                        print(f"Failed to launch {name}: {e}")
-                        return False
+            if any(self.is_process_running(exe, running) for exe in exes):
+                if name == "VOICEVOX":
+                    # Running but not answering yet (still starting up)
+                    waits.append((name, wait))
+                else:
+                    ready(name)
+                continue
+
+            if not ask_permission_callback(name):
+                return False
+            try:
+                subprocess.Popen(path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except Exception as e:
+                print(f"Failed to launch {name}: {e}")
+                return False
+            waits.append((name, wait))
+
+        if not waits:
+            return True
+        ok = True
+        with ThreadPoolExecutor(max_workers=len(waits)) as pool:
+            futures = {pool.submit(wait): name for name, wait in waits}
+            for future in as_completed(futures):
+                name = futures[future]
+                if future.result():
+                    ready(name)
                 else:
-                    return False
-        return True
+                    print(f"{name} did not become ready in time")
+                    ok = False
+        return ok
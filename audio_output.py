@@ -0,0 +1,360 @@
+import time
+import wave
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+INT16_SCALE = 1.0 / 32768.0
+
+
+class RingBuffer:
+    """Single-producer/single-consumer ring buffer of audio frames.
+
+    The producer only advances the write counter and the audio callback only
+    advances the read counter, so the two sides never need a lock.
+    """
+
+    def __init__(self, capacity, channels, dtype=np.float32):
+        self.capacity = capacity
+        self.channels = channels
+        self._buf = np.zeros((capacity, channels), dtype=dtype)
+        self._read = 0
+        self._write = 0
+
+    def available(self):
+        return self._write - self._read
+
+    def space(self):
+        return self.capacity - (self._write - self._read)
+
+    def write(self, frames):
+        """Copies as many frames as fit; returns the number written."""
+        n = min(len(frames), self.space())
+        if n <= 0:
+            return 0
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = frames[:first]
+        if n > first:
+            self._buf[:n - first] = frames[first:n]
+        self._write += n
+        return n
+
+    def read(self, n):
+        """Returns up to n frames as one or two views into the buffer."""
+        n = min(n, self.available())
+        if n <= 0:
+            return ()
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        if n > first:
+            chunks = (self._buf[start:start + first], self._buf[:n - first])
+        else:
+            chunks = (self._buf[start:start + n],)
+        return chunks
+
+    def advance(self, n):
+        self._read += n
+
+
+def _mix(out, chunk, gain):
+    if chunk.dtype == np.int16:
+        gain = gain * INT16_SCALE
+    if chunk.shape[1] == out.shape[1] or chunk.shape[1] == 1:
+        out += chunk * np.float32(gain)
+    else:
+        # Downmix to a mono device
+        out += chunk.mean(axis=1, keepdims=True, dtype=np.float32) * np.float32(gain)
+
+
+class Voice(ABC):
+    """A sound owned by the mixer. wait() returns once it finished or was stopped.
+
+    Subclasses implement mix_into(), which the mixer calls once per block.
+    """
+
+    def __init__(self, group, gain=1.0):
+        self.group = group
+        self.gain = gain
+        self.stopped = False
+        self.started_at = None
+        self.started = threading.Event()
+        self.done = threading.Event()
+
+    def stop(self):
+        self.stopped = True
+        self.done.set()
+
+    def _mark_started(self):
+        if self.started_at is None:
+            # Monotonic time the first samples were handed to the device
+            self.started_at = time.monotonic()
+            self.started.set()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def is_active(self):
+        return not self.done.is_set()
+
+    @abstractmethod
+    def mix_into(self, out):
+        """Adds the next len(out) frames to out and sets done when finished."""
+
+
+class BufferVoice(Voice):
+    """Plays a prepared array. Slices are mixed directly, so no copy is made."""
+
+    def __init__(self, audio, group, gain=1.0, pad_frames=0):
+        super().__init__(group, gain)
+        self.audio = audio
+        self.pad_frames = pad_frames
+        self.pos = 0
+
+    def mix_into(self, out):
+        frames = len(out)
+        chunk = self.audio[self.pos:self.pos + frames]
+        if len(chunk):
+            _mix(out[:len(chunk)], chunk, self.gain)
+            self._mark_started()
+        self.pos += frames
+        # Trailing silence is just time spent, not samples
+        if self.pos >= len(self.audio) + self.pad_frames:
+            self.done.set()
+
+
+class StreamVoice(Voice):
+    """Plays audio that is still being produced, fed through a ring buffer."""
+
+    def __init__(self, channels, group, gain=1.0, capacity_frames=48000 * 4, dtype=np.int16):
+        super().__init__(group, gain)
+        self.ring = RingBuffer(capacity_frames, channels, dtype)
+        self.pad_frames = 0
+        self._pad_left = None
+        self._closed = False
+        self._space = threading.Event()
+
+    def write(self, audio, timeout=0.05):
+        """Queues audio, blocking while the ring is full. Returns False if stopped."""
+        pos = 0
+        while pos < len(audio):
+            if self.stopped:
+                return False
+            written = self.ring.write(audio[pos:])
+            pos += written
+            if not written:
+                self._space.clear()
+                self._space.wait(timeout)
+        return not self.stopped
+
+    def close(self, pad_frames=0):
+        """Marks the end of input; the voice finishes once the ring drains."""
+        self.pad_frames = pad_frames
+        self._closed = True
+
+    def mix_into(self, out):
+        frames = len(out)
+        offset = 0
+        for chunk in self.ring.read(frames):
+            _mix(out[offset:offset + len(chunk)], chunk, self.gain)
+            offset += len(chunk)
+        if offset:
+            self.ring.advance(offset)
+            self._mark_started()
+            self._space.set()
+
+        if self._closed and self.ring.available() == 0:
+            if self._pad_left is None:
+                self._pad_left = self.pad_frames
+            self._pad_left -= frames - offset
+            if self._pad_left <= 0:
+                self.done.set()
+
+
+# VOICEVOX renders at 24 kHz unless the AudioQuery asks for another rate
+VOICEVOX_RATE = 24000
+
+
+def negotiate_output_rate(device=None, preferred=None, engine_rate_matching=True):
+    """Picks the sample rate to open device with.
+
+    The device's default rate comes first so the OS mixer does not resample
+    either; when VOICEVOX is asked to render at the same rate
+    (engine_rate_matching) nothing is resampled on our side. Otherwise rates
+    with an exact ratio to 24 kHz are preferred, since integer upsampling is
+    the cheapest path. Every candidate is checked with
+    sd.check_output_settings; `preferred` (from the config) is tried first.
+    """
+    import sounddevice as sd
+
+    info = sd.query_devices(device, "output")
+    channels = max(1, min(2, int(info["max_output_channels"])))
+    default = int(info.get("default_samplerate") or 48000)
+
+    candidates = [default, 48000, 44100, VOICEVOX_RATE, 96000]
+    if not engine_rate_matching:
+        candidates.sort(key=lambda rate: rate % VOICEVOX_RATE != 0 and VOICEVOX_RATE % rate != 0)
+    if preferred:
+        candidates.insert(0, int(preferred))
+
+    for rate in dict.fromkeys(candidates):
+        try:
+            sd.check_output_settings(device=device, samplerate=rate, channels=channels, dtype="float32")
+            return rate
+        except Exception:
+            continue
+    return default
+
+
+class AudioOutput:
+    """Long-lived output stream that mixes all active voices in its callback."""
+
+    def __init__(self, device=None, samplerate=48000, blocksize=512, latency="low", channels=None):
+        self.device = device
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.latency = latency
+
+        if channels is None:
+            import sounddevice as sd
+            info = sd.query_devices(device, "output")
+            channels = max(1, min(2, int(info["max_output_channels"])))
+        self.channels = channels
+
+        self._voices = ()
+        self._lock = threading.Lock()
+        self._stream = None
+
+    def start(self):
+        if self._stream is not None:
+            return
+        import sounddevice as sd
+        self._stream = sd.OutputStream(
+            samplerate=self.samplerate,
+            blocksize=self.blocksize,
+            device=self.device,
+            channels=self.channels,
+            dtype="float32",
+            latency=self.latency,
+            callback=self._callback
+        )
+        self._stream.start()
+
+    def close(self):
+        self.stop_group(None)
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception as e:
+                print(f"Error closing output stream: {e}")
+            self._stream = None
+
+    def latency_frames(self):
+        """Frames the device still has to play after a voice was mixed in."""
+        latency = getattr(self._stream, "latency", None) if self._stream is not None else None
+        if not isinstance(latency, (int, float)):
+            return self.blocksize
+        return int(latency * self.samplerate) + self.blocksize
+
+    def play(self, audio, group, gain=1.0, pad_frames=0):
+        """Starts playing a prepared (frames, channels) array."""
+        voice = BufferVoice(audio, group, gain, pad_frames)
+        self._add(voice)
+        return voice
+
+    def open_voice(self, channels, group, gain=1.0, capacity_frames=None):
+        """Returns a StreamVoice that is fed incrementally with write()."""
+        if capacity_frames is None:
+            capacity_frames = self.samplerate * 4
+        voice = StreamVoice(channels, group, gain, capacity_frames)
+        self._add(voice)
+        return voice
+
+    def stop_group(self, group):
+        """Stops all voices of a group, or every voice when group is None."""
+        with self._lock:
+            for voice in self._voices:
+                if group is None or voice.group == group:
+                    voice.stop()
+            self._voices = tuple(v for v in self._voices if v.is_active())
+
+    def is_busy(self, group=None):
+        return any(v.is_active() and (group is None or v.group == group) for v in self._voices)
+
+    def _add(self, voice):
+        self.start()
+        with self._lock:
+            # Publish a new tuple; the callback only ever reads the reference
+            self._voices = tuple(v for v in self._voices if v.is_active()) + (voice,)
+
+    def _callback(self, outdata, frames, time_info, status):
+        outdata.fill(0)
+        for voice in self._voices:
+            if not voice.done.is_set():
+                voice.mix_into(outdata)
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+
+
+class SinkOutput(AudioOutput):
+    """AudioOutput without a sound card, for benchmarks and headless runs.
+
+    A thread pulls mixed blocks from the callback at real-time pace (or as
+    fast as possible with realtime=False) and either discards them or, with
+    a path, writes them to a WAV file.
+    """
+
+    def __init__(self, samplerate=48000, blocksize=512, channels=2, path=None, realtime=True):
+        super().__init__(None, samplerate, blocksize, latency=None, channels=channels)
+        self.path = path
+        self.realtime = realtime
+        self.frames_written = 0
+        self._stop = threading.Event()
+        self._wav = None
+
+    def latency_frames(self):
+        return self.blocksize
+
+    def start(self):
+        if self._stream is not None:
+            return
+        if self.path:
+            self._wav = wave.open(self.path, "wb")
+            self._wav.setnchannels(self.channels)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(self.samplerate)
+        self._stop.clear()
+        self._stream = threading.Thread(target=self._run, name="audio-sink", daemon=True)
+        self._stream.start()
+
+    def close(self):
+        self.stop_group(None)
+        if self._stream is not None:
+            self._stop.set()
+            self._stream.join()
+            self._stream = None
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def _run(self):
+        out = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        block_seconds = self.blocksize / self.samplerate
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            self._callback(out, self.blocksize, None, None)
+            self.frames_written += self.blocksize
+            if self._wav is not None:
+                self._wav.writeframes((out * 32767).astype(np.int16).tobytes())
+            if self.realtime:
+                next_time += block_seconds
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            elif not self.is_busy():
+                # Nothing to play: drop finished voices and idle instead of spinning
+                with self._lock:
+                    self._voices = tuple(v for v in self._voices if v.is_active())
+                time.sleep(0.001)
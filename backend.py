@@ -0,0 +1,71 @@
+from abc import ABC, abstractmethod
+
+
+class SynthesisBackend(ABC):
+    """Interface VoiceVoxPlayer uses to turn text into audio.
+
+    Queries are AudioQuery dicts in the VOICEVOX engine's JSON layout
+    (camelCase keys) and synthesis() returns WAV bytes, whatever the backend
+    does internally. Cancellable calls take an optional CancelScope.
+    A backend missing one of the abstract methods fails when it is created.
+    """
+
+    name = "base"
+    # Whether synthesis_stream() can hand out the WAV while it is produced
+    supports_streaming = False
+
+    @abstractmethod
+    def get_speakers(self):
+        """Returns the speaker list in /speakers format, or [] when unavailable."""
+
+    def get_version(self):
+        return None
+
+    @abstractmethod
+    def audio_query(self, text, speaker_id, scope=None):
+        """Returns the AudioQuery dict for text, or None on error."""
+
+    @abstractmethod
+    def synthesis(self, query, speaker_id, scope=None):
+        """Returns WAV bytes for an AudioQuery, or None on error."""
+
+    def synthesis_stream(self, query, speaker_id, scope=None):
+        """Only called when supports_streaming is set."""
+        raise NotImplementedError
+
+    def initialize_speaker(self, speaker_id, skip_reinit=True):
+        return True
+
+    def is_initialized_speaker(self, speaker_id):
+        return True
+
+    def latency_summary(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+def create_backend(voicevox_url, config):
+    """Builds the backend selected by config["tts_backend"] ("http", "core" or "offline")."""
+    # Imported here since the backend modules import this one
+    kind = config.get("tts_backend", "http")
+    if kind == "offline":
+        from offline_backend import OfflineBackend
+        return OfflineBackend.from_config(config)
+    if kind == "core":
+        from core_backend import CoreBackend
+        try:
+            return CoreBackend.from_config(config)
+        except Exception as e:
+            print(f"voicevox_core backend unavailable, using HTTP: {e}")
+    elif kind != "http":
+        print(f"Unknown tts_backend {kind!r}, using HTTP")
+
+    from http_client import VoiceVoxClient
+    from engine_pool import EnginePool
+    # voicevox_url may also be a list of engines to load-balance over
+    urls = voicevox_url if isinstance(voicevox_url, (list, tuple)) else [voicevox_url]
+    if len(urls) > 1:
+        return EnginePool.from_config(urls, config)
+    return VoiceVoxClient.from_config(urls[0], config)
@@ -0,0 +1,200 @@
+"""Renders a JSONL script to WAV files without the GUI.
+
+Each line is a JSON object:
+    {"text": "...", "speaker": "ずんだもん", "style": "ノーマル",
+     "speed": 1.0, "volume": 1.0, "pitch": 0.0, "output": "line001.wav"}
+"speaker_id" may be given instead of speaker/style. Lines whose output file
+already exists are skipped, so an interrupted run can simply be restarted.
+
+Usage:
+    python batch_render.py script.jsonl --out-dir out --url http://127.0.0.1:50021 --url http://127.0.0.1:50022
+"""
+import os
+import sys
+import json
+import time
+import wave
+import queue
+import argparse
+import threading
+
+from audio_engine import VoiceVoxPlayer
+
+
+def load_script(path):
+    lines = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, raw in enumerate(f, 1):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                item = json.loads(raw)
+            except json.JSONDecodeError as e:
+                print(f"Line {number}: invalid JSON ({e})")
+                continue
+            if not item.get("text") or not item.get("output"):
+                print(f"Line {number}: 'text' and 'output' are required")
+                continue
+            item["_line"] = number
+            lines.append(item)
+    return lines
+
+
+def build_speaker_index(speakers):
+    """Maps (name, style) -> style id."""
+    index = {}
+    for sp in speakers:
+        for style in sp["styles"]:
+            index[(sp["name"], style["name"])] = style["id"]
+    return index
+
+
+def resolve_speaker(item, index, default_style):
+    if "speaker_id" in item:
+        return int(item["speaker_id"])
+    name = item.get("speaker")
+    style = item.get("style", default_style)
+    if (name, style) in index:
+        return index[(name, style)]
+    return None
+
+
+def write_wav(path, audio, rate):
+    tmp_path = f"{path}.tmp"
+    with wave.open(tmp_path, "wb") as wf:
+        wf.setnchannels(audio.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(audio.tobytes())
+    os.replace(tmp_path, path)
+
+
+class BatchRenderer:
+    """Fans script lines out over worker threads sharing one player.
+
+    With several URLs the player's engine pool sends each request to the
+    least busy healthy engine.
+    """
+
+    def __init__(self, urls, out_dir, rate=48000, jobs_per_url=2, config=None, cache_dir=None):
+        self.out_dir = out_dir
+        self.rate = rate
+        # Own caches: a large batch must not evict the GUI's audio, which
+        # history replay depends on
+        config = {
+            "metrics_log": False,
+            **(config or {}),
+            "cache_dir": cache_dir or os.path.join(out_dir, ".cache")
+        }
+        self.player = VoiceVoxPlayer(urls if len(urls) > 1 else urls[0], config=config)
+        self.workers = jobs_per_url * len(urls)
+
+        self.rendered = 0
+        self.skipped = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def run(self, lines, default_style="ノーマル"):
+        speakers = self.player.get_speakers()
+        index = build_speaker_index(speakers)
+
+        work = queue.Queue()
+        for item in lines:
+            output = os.path.join(self.out_dir, item["output"])
+            if os.path.exists(output):
+                self.skipped += 1
+                continue
+            speaker_id = resolve_speaker(item, index, default_style)
+            if speaker_id is None:
+                print(f"Line {item['_line']}: unknown speaker {item.get('speaker')!r} / {item.get('style', default_style)!r}")
+                self.failed += 1
+                continue
+            work.put((item, speaker_id, output))
+
+        start = time.perf_counter()
+        threads = []
+        for _ in range(self.workers):
+            t = threading.Thread(target=self._worker, args=(work,), daemon=True)
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+        return time.perf_counter() - start
+
+    def _worker(self, work):
+        while True:
+            try:
+                item, speaker_id, output = work.get_nowait()
+            except queue.Empty:
+                return
+
+            params = (
+                float(item.get("speed", 1.0)),
+                float(item.get("volume", 1.0)),
+                float(item.get("pitch", 0.0)),
+                self.rate,
+                self.player.pre_phoneme_length,
+                self.player.post_phoneme_length
+            )
+            try:
+                audio = self.player.synthesize(item["text"], speaker_id, params)
+                if audio is None:
+                    raise RuntimeError("synthesis failed")
+                os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+                write_wav(output, audio, self.rate)
+            except Exception as e:
+                print(f"Line {item['_line']}: {e}")
+                with self._lock:
+                    self.failed += 1
+                continue
+
+            with self._lock:
+                self.rendered += 1
+                self.audio_seconds += len(audio) / self.rate
+                print(item["output"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("script", help="JSONL file with one line to render per row")
+    parser.add_argument("--out-dir", default="rendered", help="directory for the WAV files")
+    parser.add_argument("--url", action="append", help="VOICEVOX engine URL (repeat for several engines)")
+    parser.add_argument("--jobs", type=int, default=2, help="parallel requests per engine")
+    parser.add_argument("--rate", type=int, default=48000, help="output sample rate")
+    parser.add_argument("--style", default="ノーマル", help="style used when a line has none")
+    parser.add_argument("--backend", choices=("http", "core", "offline"), help="synthesis backend (default: http)")
+    parser.add_argument("--config", help="config.json to read backend and cache settings from")
+    parser.add_argument("--cache-dir", help="synthesis cache directory (default: <out-dir>/.cache)")
+    args = parser.parse_args()
+
+    urls = args.url or ["http://127.0.0.1:50021"]
+    lines = load_script(args.script)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    config = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    if args.backend:
+        config["tts_backend"] = args.backend
+    renderer = BatchRenderer(urls, args.out_dir, rate=args.rate, jobs_per_url=args.jobs, config=config, cache_dir=args.cache_dir)
+    try:
+        elapsed = renderer.run(lines, default_style=args.style)
+    finally:
+        renderer.player.close()
+
+    print()
+    print(f"Rendered {renderer.rendered}, skipped {renderer.skipped} (already done), failed {renderer.failed}")
+    if renderer.rendered and elapsed > 0:
+        print(f"Wall time {elapsed:.2f}s: {renderer.rendered / elapsed:.2f} lines/s, "
+              f"{renderer.audio_seconds / elapsed:.2f} audio-s per wall-s")
+    if hasattr(renderer.player.client, "instance_stats"):
+        for stats in renderer.player.client.instance_stats():
+            print(f"  {stats['url']}: {stats['requests']} requests, {stats['failures']} failures")
+    return 1 if renderer.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
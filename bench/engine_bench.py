@@ -0,0 +1,133 @@
+"""End-to-end benchmark of VoiceVoxPlayer against the mock VOICEVOX server.
+
+Plays through a null (or WAV file) sink instead of a sound card and reports
+time-to-first-audio and end-to-end latency percentiles, synthesis throughput
+at several concurrency levels and peak RSS. Caches live in a temporary
+directory, so runs do not touch asset/cache.
+
+Usage:
+    python bench/engine_bench.py [--utterances 20] [--concurrency 1,4,8]
+        [--delay 0.1] [--wav-seconds 1.0] [--no-cache] [--no-pipeline]
+        [--stream] [--sink null|out.wav] [--fast]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_voicevox import MockVoiceVox
+from audio_engine import VoiceVoxPlayer
+
+SPEAKER_ID = 3
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def make_text(i, prefix=""):
+    return f"{prefix}ベンチマーク{i}番目の発言です。続きの文もあります。"
+
+
+def run_latency(player, count, repeat):
+    records = []
+    player.on_metrics = lambda record: records.append(record) if record["kind"] == "speech" else None
+    for i in range(count):
+        text = make_text(0 if repeat else i)
+        player.speak(text, SPEAKER_ID).wait()
+    # on_metrics runs right after playback; give the last one a moment
+    time.sleep(0.05)
+    return records
+
+
+def run_throughput(player, concurrency, count):
+    params = player._voice_params()
+    texts = [make_text(i, prefix=f"c{concurrency}-") for i in range(count)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda text: player.synthesize(text, SPEAKER_ID, params), texts))
+    elapsed = time.perf_counter() - start
+    audio_seconds = sum(len(a) for a in results if a is not None) / player.output_sample_rate
+    failed = sum(1 for a in results if a is None)
+    return elapsed, audio_seconds, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated worker counts for the throughput run")
+    parser.add_argument("--query-delay", type=float, default=0.01, help="mock seconds per /audio_query")
+    parser.add_argument("--delay", type=float, default=0.1, help="mock seconds per /synthesis")
+    parser.add_argument("--wav-seconds", type=float, default=0.0, help="mock audio length (0: by text length)")
+    parser.add_argument("--repeat", action="store_true", help="speak the same line every time (cache hits)")
+    parser.add_argument("--no-cache", action="store_true", help="disable the synthesis and AudioQuery caches")
+    parser.add_argument("--no-pipeline", action="store_true", help="disable sentence pipelining")
+    parser.add_argument("--stream", action="store_true", help="enable streamed /synthesis")
+    parser.add_argument("--rate", type=int, default=48000, help="output sample rate")
+    parser.add_argument("--sink", default="null", help="'null' or a WAV file to record the output to")
+    parser.add_argument("--fast", action="store_true", help="do not pace the sink in real time")
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+
+    mock = MockVoiceVox(query_delay=args.query_delay, synthesis_delay=args.delay, wav_seconds=args.wav_seconds).start()
+    cache_dir = tempfile.mkdtemp(prefix="vlive-bench-")
+    config = {
+        "cache_dir": cache_dir,
+        "metrics_log": False,
+        "audio_sink": args.sink,
+        "audio_sink_realtime": not args.fast,
+        "output_sample_rate": args.rate,
+        "pipeline_synthesis": not args.no_pipeline,
+        "stream_synthesis": args.stream,
+        "speech_mode": "enqueue",
+        "persist_query_cache": False,
+        "http_pool_size": max(levels + [4]),
+    }
+    if args.no_cache:
+        config.update({"tts_cache_mb": 0, "tts_disk_cache_mb": 0, "query_cache_entries": 0})
+
+    player = VoiceVoxPlayer(mock.url, config=config)
+    player.set_output_device(None)
+    try:
+        print(f"mock: /audio_query {args.query_delay * 1000:.0f} ms, /synthesis {args.delay * 1000:.0f} ms, "
+              f"cache {'off' if args.no_cache else 'on'}, pipeline {'off' if args.no_pipeline else 'on'}, "
+              f"stream {'on' if args.stream else 'off'}, {args.rate} Hz")
+
+        records = run_latency(player, args.utterances, args.repeat)
+        summary = player.get_metrics_summary()
+        print(f"\nlatency over {len(records)} utterances (ms)")
+        print(f"{'':>12} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for field, label in (("ttfa_ms", "first audio"), ("total_ms", "end to end")):
+            s = summary.get(field)
+            if s:
+                print(f"{label:>12} {s['p50']:>8.1f} {s['p95']:>8.1f} {s['p99']:>8.1f}")
+
+        print(f"\nsynthesis throughput ({args.utterances} utterances per level)")
+        print(f"{'workers':>8} {'wall s':>8} {'utt/s':>8} {'audio s/s':>10} {'failed':>7}")
+        for concurrency in levels:
+            elapsed, audio_seconds, failed = run_throughput(player, concurrency, args.utterances)
+            print(f"{concurrency:>8} {elapsed:>8.2f} {args.utterances / elapsed:>8.1f} {audio_seconds / elapsed:>10.1f} {failed:>7}")
+
+        rss = peak_rss_mb()
+        print(f"\npeak RSS: {rss:.1f} MB" if rss is not None else "\npeak RSS: n/a on this platform")
+        print(f"cache: {player.get_cache_stats()}")
+        print(f"mock requests: {mock.counts}")
+    finally:
+        player.close()
+        mock.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
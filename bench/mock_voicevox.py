@@ -0,0 +1,164 @@
+"""Minimal stand-in for the VOICEVOX engine HTTP API, for benchmarks.
+
+Implements /version, /speakers, /audio_query, /synthesis, /initialize_speaker
+and /is_initialized_speaker. Synthesis returns a tone whose length is either
+fixed (--wav-seconds) or proportional to the text, after a configurable delay.
+
+Usage:
+    python bench/mock_voicevox.py [--port 50021] [--delay 0.2] [--wav-seconds 0]
+"""
+import io
+import json
+import time
+import wave
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+SPEAKERS = [
+    {
+        "name": "ずんだもん",
+        "speaker_uuid": "mock-zundamon",
+        "styles": [{"name": "ノーマル", "id": 3}, {"name": "あまあま", "id": 1}],
+        "version": "mock",
+    }
+]
+
+
+class MockVoiceVox:
+    """Runs the mock engine on a background thread; port 0 picks a free port."""
+
+    def __init__(self, port=0, query_delay=0.0, synthesis_delay=0.1, wav_seconds=0.0, seconds_per_char=0.12):
+        self.query_delay = query_delay
+        self.synthesis_delay = synthesis_delay
+        self.wav_seconds = wav_seconds
+        self.seconds_per_char = seconds_per_char
+        self.counts = {}
+        self._lock = threading.Lock()
+
+        mock = self
+
+        class Handler(_Handler):
+            server_state = mock
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-voicevox", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, path):
+        with self._lock:
+            self.counts[path] = self.counts.get(path, 0) + 1
+
+    def render(self, query):
+        rate = int(query.get("outputSamplingRate", 24000))
+        seconds = self.wav_seconds or max(0.2, len(query.get("kana", "")) * self.seconds_per_char)
+        seconds /= max(0.1, float(query.get("speedScale", 1.0)))
+        pre = float(query.get("prePhonemeLength", 0.1))
+        post = float(query.get("postPhonemeLength", 0.1))
+        t = np.arange(int(seconds * rate)) / rate
+        tone = np.sin(2 * np.pi * 220 * t) * 8000 * float(query.get("volumeScale", 1.0))
+        audio = np.concatenate([np.zeros(int(pre * rate)), tone, np.zeros(int(post * rate))]).astype(np.int16)
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(audio.tobytes())
+        return buf.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=b"", content_type="application/json"):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, value):
+        self._send(200, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server_state.count(url.path)
+        if url.path == "/version":
+            self._json("mock")
+        elif url.path == "/speakers":
+            self._json(SPEAKERS)
+        elif url.path == "/is_initialized_speaker":
+            self._json(True)
+        else:
+            self._send(404)
+
+    def do_POST(self):
+        state = self.server_state
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        state.count(url.path)
+
+        if url.path == "/audio_query":
+            time.sleep(state.query_delay)
+            self._json({
+                "accent_phrases": [],
+                "speedScale": 1.0,
+                "pitchScale": 0.0,
+                "intonationScale": 1.0,
+                "volumeScale": 1.0,
+                "prePhonemeLength": 0.1,
+                "postPhonemeLength": 0.1,
+                "outputSamplingRate": 24000,
+                "outputStereo": False,
+                "kana": params.get("text", [""])[0],
+            })
+        elif url.path == "/synthesis":
+            time.sleep(state.synthesis_delay)
+            self._send(200, state.render(json.loads(body)), "audio/wav")
+        elif url.path == "/initialize_speaker":
+            self._send(204)
+        else:
+            self._send(404)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=50021)
+    parser.add_argument("--query-delay", type=float, default=0.0, help="seconds per /audio_query")
+    parser.add_argument("--delay", type=float, default=0.1, help="seconds per /synthesis")
+    parser.add_argument("--wav-seconds", type=float, default=0.0, help="fixed audio length (0: by text length)")
+    args = parser.parse_args()
+
+    mock = MockVoiceVox(args.port, args.query_delay, args.delay, args.wav_seconds).start()
+    print(f"Mock VOICEVOX on {mock.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Measures allocations of the decode -> resample -> trim path used for every utterance.
+
+Runs VoiceVoxPlayer.synthesize() itself, with a backend that answers with a
+prepared WAV, so the numbers cover the code that ships from the response
+body to the cached PCM. Fails (exit code 1) if the tracemalloc peak of one
+utterance exceeds --max-ratio times the size of the int16 output buffer.
+
+Usage:
+    python bench/pipeline_bench.py [--in-rate 24000] [--out-rate 48000] [--max-ratio 3.0]
+"""
+import io
+import os
+import sys
+import wave
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_engine import VoiceVoxPlayer
+from offline_backend import OfflineBackend
+
+SPEAKER_ID = 3
+
+
+class PreparedWavBackend(OfflineBackend):
+    """Answers /synthesis with a WAV built beforehand, so generating it is not measured."""
+
+    wav_bytes = b""
+
+    def synthesis(self, query, speaker_id, scope=None):
+        return self.wav_bytes
+
+
+def make_wav(seconds, rate, channels=1):
+    t = np.arange(int(seconds * rate)) / rate
+    tone = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    # VOICEVOX-like lead-in and tail silence
+    tone[:int(0.1 * rate)] = 0
+    tone[-int(0.1 * rate):] = 0
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(np.repeat(tone, channels).tobytes())
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--in-rate", type=int, default=24000)
+    parser.add_argument("--out-rate", type=int, default=48000)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    player = VoiceVoxPlayer(config={
+        "tts_backend": "offline",
+        "audio_sink": "null",
+        "cache_dir": cache_dir,
+        "metrics_log": False,
+        "persist_query_cache": False,
+    })
+    backend = PreparedWavBackend()
+    # Replaces the backend the player would build on first use
+    player._client = backend
+    player.output_sample_rate = args.out_rate
+    print(f"{'length':>8} {'ch':>3} {'output MB':>10} {'peak MB':>9} {'ratio':>6}")
+
+    failed = False
+    run = 0
+    try:
+        for seconds in (1, 5, 10, 30):
+            for channels in (1, 2):
+                backend.wav_bytes = make_wav(seconds, args.in_rate, channels)
+                # Warm up filters and the buffer pool; new text each time so the cache misses
+                run += 1
+                player.synthesize(f"bench {run}", SPEAKER_ID)
+
+                run += 1
+                tracemalloc.start()
+                out = player.synthesize(f"bench {run}", SPEAKER_ID)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                if out is None:
+                    print(f"{seconds:>7}s {channels:>3}  synthesis failed")
+                    failed = True
+                    continue
+
+                # The trimmed result is a view; the allocation is the full output buffer
+                output_bytes = (out.base if out.base is not None else out).nbytes
+                ratio = peak / output_bytes
+                mark = "" if ratio <= args.max_ratio else "  FAIL"
+                failed = failed or bool(mark)
+                print(f"{seconds:>7}s {channels:>3} {output_bytes / 1e6:>10.2f} {peak / 1e6:>9.2f} {ratio:>6.2f}{mark}")
+    finally:
+        player.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"pool: {player.buffer_pool.stats()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Compares the polyphase resampler against the old scipy.signal.resample path.
+
+Usage:
+    python bench/resample_bench.py [--repeat N] [--in-rate 24000] [--out-rate 48000]
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resampler import resample_int16, get_resampler
+
+
+def fft_resample(audio, in_rate, out_rate):
+    # The previous _process_audio implementation
+    from scipy.signal import resample
+    num_samples = int(len(audio) * out_rate / in_rate)
+    out = resample(audio, num_samples)
+    return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+def make_signal(seconds, rate):
+    t = np.arange(int(seconds * rate)) / rate
+    tone = np.sin(2 * np.pi * 220 * t) + 0.3 * np.sin(2 * np.pi * 3100 * t)
+    return (tone * 8000).astype(np.int16).reshape(-1, 1)
+
+
+def measure(fn, audio, in_rate, out_rate, repeat):
+    fn(audio, in_rate, out_rate)  # warm up (filter design, imports)
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(audio, in_rate, out_rate)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(audio, in_rate, out_rate)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--in-rate", type=int, default=24000)
+    parser.add_argument("--out-rate", type=int, default=48000)
+    args = parser.parse_args()
+
+    r = get_resampler(args.in_rate, args.out_rate)
+    print(f"{args.in_rate} Hz -> {args.out_rate} Hz (up={r.up}, down={r.down}, taps={len(r.h)})")
+    print(f"{'length':>8} {'engine':>10} {'best ms':>10} {'x realtime':>11} {'peak MB':>9}")
+
+    for seconds in (1, 10, 60):
+        audio = make_signal(seconds, args.in_rate)
+        for label, fn in (("fft", fft_resample), ("polyphase", resample_int16)):
+            best, peak = measure(fn, audio, args.in_rate, args.out_rate, args.repeat)
+            print(f"{seconds:>7}s {label:>10} {best * 1000:>10.2f} {seconds / best:>11.0f} {peak / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
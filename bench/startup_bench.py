@@ -0,0 +1,144 @@
+"""Measures cold-start cost: module import time and time to the first GUI frame.
+
+Import times come from `python -X importtime` in fresh interpreters (median of
+--runs). Fails (exit code 1) if a module pulls in one of the deferred heavy
+dependencies at import time, or if its median import time exceeds --max-ms.
+
+Time to first frame starts the GUI in a child process and stops it once the
+window has been drawn; it is skipped when no display is available.
+
+Usage:
+    python bench/startup_bench.py [--runs 5] [--max-ms 0] [--no-gui]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported until they are used
+DEFERRED = {
+    "audio_engine": ("scipy", "sounddevice", "requests"),
+    "gui_ctk": ("scipy", "sounddevice", "requests", "PIL.ImageDraw"),
+}
+
+# Interesting dependencies reported when present
+WATCH = ("numpy", "customtkinter", "PIL.Image", "requests", "urllib3", "sounddevice", "scipy", "sqlite3")
+
+FIRST_FRAME_SCRIPT = r"""
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import gui_ctk
+imported = time.perf_counter()
+app = gui_ctk.VLiveCTKApp()
+created = time.perf_counter()
+
+def drawn():
+    now = time.perf_counter()
+    print(json.dumps({{"import": imported - start, "construct": created - imported, "first_frame": now - start}}), flush=True)
+    app.destroy()
+
+# Idle callbacks draw the window; the timer after them runs once that is done
+app.after_idle(lambda: app.after(0, drawn))
+app.mainloop()
+"""
+
+
+def parse_importtime(stderr):
+    """Returns {module: (self_us, cumulative_us)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            # Header line
+            continue
+        modules[parts[2].strip()] = (self_us, cumulative_us)
+    return modules
+
+
+def measure_import(module, runs):
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+        modules = parse_importtime(result.stderr)
+        totals.append(modules[module][1] / 1000.0)
+    return statistics.median(totals), modules
+
+
+def measure_first_frame(runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_FRAME_SCRIPT.format(root=ROOT)],
+            cwd=ROOT, capture_output=True, text=True, timeout=60
+        )
+        lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+        if result.returncode != 0 or not lines:
+            return None, result.stderr.strip().splitlines()[-1:] or ["no output"]
+        sample = json.loads(lines[-1])
+        # Includes interpreter startup, as a user would see it
+        sample["process"] = time.perf_counter() - started
+        samples.append(sample)
+    return {key: statistics.median(s[key] for s in samples) for key in samples[0]}, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=0.0, help="fail if a median import takes longer (0: no limit)")
+    parser.add_argument("--no-gui", action="store_true", help="skip the time-to-first-frame measurement")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"import time, median of {args.runs} runs (ms)")
+    for module, deferred in DEFERRED.items():
+        try:
+            total_ms, modules = measure_import(module, args.runs)
+        except RuntimeError as e:
+            print(e)
+            failed = True
+            continue
+        print(f"  {module:14s} {total_ms:8.1f}")
+        for name in WATCH:
+            if name in modules:
+                print(f"      {name:14s} {modules[name][1] / 1000.0:8.1f}")
+        loaded = [name for name in deferred if name in modules]
+        if loaded:
+            print(f"  FAIL: importing {module} loads {', '.join(loaded)}")
+            failed = True
+        if args.max_ms > 0 and total_ms > args.max_ms:
+            print(f"  FAIL: {module} imports in {total_ms:.1f} ms (limit {args.max_ms:.1f})")
+            failed = True
+
+    if not args.no_gui:
+        timings, error = measure_first_frame(args.runs)
+        if timings is None:
+            print(f"\ntime to first frame: skipped ({error[0]})")
+        else:
+            print(f"\ntime to first frame, median of {args.runs} runs (ms)")
+            print(f"  import gui     {timings['import'] * 1000:8.1f}")
+            print(f"  build window   {timings['construct'] * 1000:8.1f}")
+            print(f"  first frame    {timings['first_frame'] * 1000:8.1f}")
+            print(f"  with python    {timings['process'] * 1000:8.1f}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
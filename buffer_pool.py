@@ -0,0 +1,54 @@
+import threading
+
+import numpy as np
+
+
+class BufferPool:
+    """Reusable float32 scratch buffers for the resampling pipeline.
+
+    Buffers are allocated with room for a typical utterance, so most
+    requests are served without a new allocation. acquire() returns a
+    C-contiguous (frames, channels) view; hand the same view to release()
+    once it is no longer used.
+    """
+
+    def __init__(self, default_frames=48000 * 10, max_free=4):
+        self.default_frames = default_frames
+        self.max_free = max_free
+        self._free = []
+        self._lock = threading.Lock()
+
+        # Counters
+        self.reused = 0
+        self.allocated = 0
+
+    def acquire(self, frames, channels):
+        size = frames * channels
+        with self._lock:
+            # Smallest free buffer that is large enough
+            best = None
+            for i, buf in enumerate(self._free):
+                if buf.size >= size and (best is None or buf.size < self._free[best].size):
+                    best = i
+            if best is not None:
+                buf = self._free.pop(best)
+                self.reused += 1
+            else:
+                buf = None
+                self.allocated += 1
+        if buf is None:
+            buf = np.empty(max(size, self.default_frames * channels), dtype=np.float32)
+        return buf[:size].reshape(frames, channels)
+
+    def release(self, view):
+        # Walk back from the (frames, channels) view to the pooled array
+        buf = view
+        while buf.base is not None:
+            buf = buf.base
+        with self._lock:
+            if len(self._free) < self.max_free:
+                self._free.append(buf)
+
+    def stats(self):
+        with self._lock:
+            return {"reused": self.reused, "allocated": self.allocated, "free": len(self._free)}
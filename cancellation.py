@@ -0,0 +1,58 @@
+import threading
+
+
+class SynthesisCancelled(Exception):
+    """Raised when a synthesis is abandoned because its scope was cancelled."""
+
+    def __init__(self, stage):
+        super().__init__(f"cancelled during {stage}")
+        self.stage = stage
+
+
+class CancelScope:
+    """Cancellation token shared by everything working on one utterance.
+
+    Callbacks registered with add_callback() run once when the scope is
+    cancelled, e.g. to shut down an in-flight HTTP connection.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in cancel callback: {e}")
+        return True
+
+    def add_callback(self, callback):
+        """Registers callback; returns a function that unregisters it.
+
+        If the scope is already cancelled the callback runs immediately.
+        """
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def check(self, stage):
+        if self.cancelled:
+            raise SynthesisCancelled(stage)
+
+    def _remove(self, callback):
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
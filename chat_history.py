@@ -0,0 +1,217 @@
+import time
+
+import customtkinter as ctk
+
+# One layout pass per frame at most (~60 fps)
+FRAME_MS = 16
+
+
+class ChatMessage:
+    """One history entry; kept small since a long call produces thousands.
+
+    id is the HistoryStore row, where the rest of the entry lives.
+    """
+
+    __slots__ = ("id", "text", "is_se", "timestamp")
+
+    def __init__(self, text, is_se=False, timestamp=None, id=None):
+        self.id = id
+        self.text = text
+        self.is_se = is_se
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def time_str(self):
+        return time.strftime("%H:%M:%S", time.localtime(self.timestamp))
+
+
+class _BubbleSlot:
+    """A reusable row (bubble + time label) that can show any message."""
+
+    def __init__(self, master, colors, fonts, on_click):
+        self.colors = colors
+        self.row = ctk.CTkFrame(master, fg_color="transparent")
+        self.bubble = ctk.CTkFrame(self.row, corner_radius=15)
+        self.label = ctk.CTkLabel(self.bubble, text="", font=fonts["chat"], text_color=colors["text"], wraplength=300, justify="left")
+        self.label.pack(padx=10, pady=5)
+        self.time_label = ctk.CTkLabel(self.row, text="", font=("Yu Gothic UI", 10), text_color="white")
+        self.message = None
+        self.is_se = None
+        self.shown = False
+
+        def clicked(event):
+            if self.message is not None:
+                on_click(self.message)
+
+        self.bubble.bind("<Button-1>", clicked)
+        self.label.bind("<Button-1>", clicked)
+
+    def show(self, message):
+        if message is self.message:
+            return
+        if message.is_se != self.is_se:
+            # SE: grey bubble on the left; speech: green bubble on the right
+            # with the time on its left
+            self.bubble.pack_forget()
+            self.time_label.pack_forget()
+            if message.is_se:
+                self.bubble.configure(fg_color=self.colors["bubble_se"])
+                self.bubble.pack(side="left", anchor="w")
+                self.time_label.pack(side="left", anchor="w", padx=5, pady=(10, 0))
+            else:
+                self.bubble.configure(fg_color=self.colors["bubble_user"])
+                self.time_label.pack(side="right", anchor="e", padx=5, pady=(10, 0))
+                self.bubble.pack(side="right", anchor="e")
+            self.is_se = message.is_se
+        self.label.configure(text=f"♪ {message.text}" if message.is_se else message.text)
+        self.time_label.configure(text=message.time_str)
+        self.message = message
+
+
+class ChatHistoryView(ctk.CTkFrame):
+    """Chat history that only builds widgets for the messages on screen.
+
+    Messages live in a plain list of ChatMessage; a fixed pool of bubble
+    rows is filled from the newest visible message upwards, so the widget
+    count stays the same however long the history gets. Appends only mark
+    the view dirty and are drawn together on the next frame. Scrolling
+    moves by whole messages; the view follows new messages while it is at
+    the bottom.
+
+    on_select(message) is called when a bubble is clicked. on_need_older()
+    is called when the view reaches the oldest loaded message, so older
+    pages can be prepend()ed.
+    """
+
+    def __init__(self, master, colors, fonts, title="", pool_size=30):
+        super().__init__(master, fg_color=colors["chat_bg"], corner_radius=20)
+        self.messages = []
+        self._end = -1          # Index of the bottom message on screen
+        self._follow = True     # Stick to the newest message
+        self._pending = None
+        self.on_select = None
+        self.on_need_older = None
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        # Title on the left; callers may add widgets (e.g. a search box) to the header
+        self.header = ctk.CTkFrame(self, fg_color="transparent")
+        self.header.grid(row=0, column=0, columnspan=2, sticky="ew", padx=15, pady=(5, 0))
+        ctk.CTkLabel(self.header, text=title, font=fonts["bold"], text_color=colors["white"]).pack(side="left")
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew", padx=(10, 0), pady=(0, 15))
+        # Rows are stacked from the bottom; the ones that do not fit are clipped
+        self.body.pack_propagate(False)
+        self.body.bind("<Configure>", lambda e: self._schedule())
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 5), pady=(0, 15))
+
+        self.slots = [_BubbleSlot(self.body, colors, fonts, self._on_click) for _ in range(pool_size)]
+
+        # CTk widgets refuse bind_all; register on the window instead
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.winfo_toplevel().bind_all(sequence, self._on_wheel, add="+")
+
+    def append(self, text, is_se=False, message_id=None):
+        message = ChatMessage(text, is_se, id=message_id)
+        self.messages.append(message)
+        if self._follow:
+            self._end = len(self.messages) - 1
+        self._schedule()
+        return message
+
+    def prepend(self, messages):
+        """Adds older messages (oldest first) above the loaded ones."""
+        if not messages:
+            return
+        self.messages[:0] = messages
+        self._end += len(messages)
+        self._schedule()
+
+    def load(self, messages):
+        """Replaces the content (oldest first) and shows the newest message."""
+        self.messages = list(messages)
+        self.scroll_to_end()
+
+    def clear(self):
+        self.load([])
+
+    def scroll_to_end(self):
+        self._end = len(self.messages) - 1
+        self._follow = True
+        self._schedule()
+
+    def _schedule(self):
+        # Coalesce any number of changes into one render per frame
+        if self._pending is None:
+            self._pending = self.after(FRAME_MS, self._render)
+
+    def _render(self):
+        self._pending = None
+        for i, slot in enumerate(self.slots):
+            index = self._end - i
+            if index < 0:
+                if slot.shown:
+                    slot.row.pack_forget()
+                    slot.shown = False
+                continue
+            slot.show(self.messages[index])
+            if not slot.shown:
+                # Keep the pack order equal to the slot order (bottom first)
+                after = self.slots[i - 1].row if i else None
+                if after is not None:
+                    slot.row.pack(side="bottom", fill="x", pady=5, after=after)
+                else:
+                    slot.row.pack(side="bottom", fill="x", pady=5)
+                slot.shown = True
+        self._update_scrollbar()
+
+    def _visible_count(self):
+        # Rows the last layout pass had room for
+        count = sum(1 for slot in self.slots if slot.shown and slot.row.winfo_ismapped())
+        return max(1, count)
+
+    def _update_scrollbar(self):
+        total = len(self.messages)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        last = self._end + 1
+        first = max(0, last - self._visible_count())
+        self.scrollbar.set(first / total, last / total)
+
+    def _scroll_to(self, end):
+        total = len(self.messages)
+        if total == 0:
+            return
+        self._end = min(max(end, min(self._visible_count(), total) - 1), total - 1)
+        self._follow = self._end == total - 1
+        self._schedule()
+        if self.on_need_older is not None and self._end + 1 - self._visible_count() <= 0:
+            self.on_need_older()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            first = round(float(args[1]) * len(self.messages))
+            self._scroll_to(first + self._visible_count() - 1)
+        elif args[0] == "scroll":
+            step = self._visible_count() if args[2] == "pages" else 1
+            self._scroll_to(self._end + int(args[1]) * step)
+
+    def _on_click(self, message):
+        if self.on_select is not None:
+            self.on_select(message)
+
+    def _on_wheel(self, event):
+        if not str(event.widget).startswith(str(self)):
+            return
+        if event.num == 4:
+            step = -1
+        elif event.num == 5:
+            step = 1
+        else:
+            # Windows reports multiples of 120, macOS small deltas
+            step = -1 if event.delta > 0 else 1
+        self._scroll_to(self._end + step)
@@ -0,0 +1,98 @@
+import re
+import dataclasses
+import threading
+
+from backend import SynthesisBackend
+
+
+def _camel(name):
+    return re.sub(r"_([a-z])", lambda m: m.group(1).upper(), name)
+
+
+def _snake(name):
+    return re.sub(r"([A-Z])", lambda m: "_" + m.group(1).lower(), name)
+
+
+class CoreBackend(SynthesisBackend):
+    """Synthesizes in-process through the voicevox_core Python bindings (0.15 API).
+
+    Skips the HTTP round trips and JSON work of the engine. The library is
+    imported when the backend is created, so it stays an optional dependency.
+    Calls into the core cannot be interrupted; cancellation is checked
+    before and after each one.
+    """
+
+    name = "core"
+
+    def __init__(self, open_jtalk_dict_dir, acceleration_mode="AUTO", cpu_num_threads=0):
+        import voicevox_core
+
+        self._vv = voicevox_core
+        self.core = voicevox_core.VoicevoxCore(
+            acceleration_mode=acceleration_mode,
+            cpu_num_threads=cpu_num_threads,
+            open_jtalk_dict_dir=open_jtalk_dict_dir
+        )
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        dict_dir = config.get("core_dict_dir")
+        if not dict_dir:
+            raise ValueError("core_dict_dir (Open JTalk dictionary) is not set")
+        return cls(
+            dict_dir,
+            acceleration_mode=config.get("core_acceleration", "AUTO"),
+            cpu_num_threads=int(config.get("core_cpu_threads", 0))
+        )
+
+    def get_speakers(self):
+        return [dataclasses.asdict(meta) for meta in self.core.metas]
+
+    def get_version(self):
+        return getattr(self._vv, "__version__", "core")
+
+    def audio_query(self, text, speaker_id, scope=None):
+        if scope is not None:
+            scope.check("/audio_query")
+        self.initialize_speaker(speaker_id)
+        query = self.core.audio_query(text, speaker_id)
+        # Engine JSON layout: camelCase at the top level except accent_phrases,
+        # snake_case inside the phrases
+        return {(k if k == "accent_phrases" else _camel(k)): v for k, v in dataclasses.asdict(query).items()}
+
+    def synthesis(self, query, speaker_id, scope=None):
+        if scope is not None:
+            scope.check("/synthesis")
+        self.initialize_speaker(speaker_id)
+        wav = self.core.synthesis(self._to_core_query(query), speaker_id)
+        if scope is not None:
+            scope.check("/synthesis")
+        return wav
+
+    def initialize_speaker(self, speaker_id, skip_reinit=True):
+        with self._load_lock:
+            if not (skip_reinit and self.core.is_model_loaded(speaker_id)):
+                self.core.load_model(speaker_id)
+        return True
+
+    def is_initialized_speaker(self, speaker_id):
+        return self.core.is_model_loaded(speaker_id)
+
+    def _to_core_query(self, query):
+        vv = self._vv
+
+        def mora(m):
+            return vv.Mora(**m) if m else None
+
+        fields = {_snake(k): v for k, v in query.items()}
+        fields["accent_phrases"] = [
+            vv.AccentPhrase(
+                moras=[mora(m) for m in phrase["moras"]],
+                accent=phrase["accent"],
+                pause_mora=mora(phrase.get("pause_mora")),
+                is_interrogative=phrase.get("is_interrogative", False)
+            )
+            for phrase in query["accent_phrases"]
+        ]
+        return vv.AudioQuery(**fields)
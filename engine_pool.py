@@ -0,0 +1,171 @@
+import time
+import threading
+
+import requests
+
+from http_client import VoiceVoxClient
+from backend import SynthesisBackend
+
+
+class _Instance:
+    def __init__(self, client):
+        self.client = client
+        self.healthy = True
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.version = None
+        self.last_probe = None
+
+
+class EnginePool(SynthesisBackend):
+    """Spreads requests over several VOICEVOX engines.
+
+    Has the same interface as VoiceVoxClient. Each request goes to the healthy
+    instance with the fewest requests in flight; if it times out or refuses
+    the connection, the instance is marked unhealthy and the request is
+    retried on the next one. A background thread probes /version to bring
+    instances back (or take them out) between requests.
+    """
+
+    name = "http"
+    supports_streaming = True
+
+    def __init__(self, clients, health_interval=5.0):
+        self.instances = [_Instance(client) for client in clients]
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._probe_thread = None
+        if health_interval > 0:
+            self._probe_thread = threading.Thread(target=self._probe_loop, name="voicevox-health", daemon=True)
+            self._probe_thread.start()
+
+    @classmethod
+    def from_config(cls, base_urls, config):
+        clients = [VoiceVoxClient.from_config(url, config) for url in base_urls]
+        return cls(clients, health_interval=float(config.get("engine_health_interval", 5.0)))
+
+    @property
+    def base_url(self):
+        return self.instances[0].client.base_url
+
+    def get_speakers(self):
+        """Fetches speakers from the first healthy instance that answers."""
+        for instance in self._ordered():
+            speakers = instance.client.get_speakers()
+            if speakers:
+                return speakers
+        return []
+
+    def get_version(self):
+        for instance in self._ordered():
+            version = instance.client.get_version()
+            if version is not None:
+                return version
+        return None
+
+    def audio_query(self, text, speaker_id, scope=None):
+        return self._dispatch("audio_query", text, speaker_id, scope=scope)
+
+    def synthesis(self, query, speaker_id, scope=None):
+        return self._dispatch("synthesis", query, speaker_id, scope=scope)
+
+    def synthesis_stream(self, query, speaker_id, scope=None):
+        return self._dispatch("synthesis_stream", query, speaker_id, scope=scope)
+
+    def initialize_speaker(self, speaker_id, skip_reinit=True):
+        """Loads the speaker on every healthy instance, since any of them may synthesize it."""
+        ok = False
+        for instance in self._ordered():
+            if not instance.healthy:
+                continue
+            try:
+                ok = instance.client.initialize_speaker(speaker_id, skip_reinit) or ok
+            except requests.RequestException as e:
+                self._mark_failed(instance, e)
+        return ok
+
+    def is_initialized_speaker(self, speaker_id):
+        """True only if every healthy instance has the speaker loaded."""
+        result = None
+        for instance in self._ordered():
+            if not instance.healthy:
+                continue
+            try:
+                loaded = instance.client.is_initialized_speaker(speaker_id)
+            except requests.RequestException as e:
+                self._mark_failed(instance, e)
+                continue
+            if loaded is False:
+                return False
+            if loaded:
+                result = True
+        return result
+
+    def latency_summary(self):
+        summary = {"instances": self.instance_stats()}
+        for instance in self.instances:
+            summary[instance.client.base_url] = instance.client.latency_summary()
+        return summary
+
+    def instance_stats(self):
+        with self._lock:
+            return [{
+                "url": i.client.base_url,
+                "healthy": i.healthy,
+                "version": i.version,
+                "in_flight": i.in_flight,
+                "requests": i.requests,
+                "failures": i.failures,
+            } for i in self.instances]
+
+    def close(self):
+        self._stop.set()
+        for instance in self.instances:
+            instance.client.close()
+
+    def _ordered(self):
+        """Healthy instances by in-flight count, then unhealthy ones as a last resort."""
+        with self._lock:
+            return sorted(self.instances, key=lambda i: (not i.healthy, i.in_flight))
+
+    def _dispatch(self, method, *args, scope=None):
+        last_error = None
+        for instance in self._ordered():
+            with self._lock:
+                instance.in_flight += 1
+                instance.requests += 1
+            try:
+                return getattr(instance.client, method)(*args, scope=scope)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # SynthesisCancelled is not a RequestException and propagates as is
+                self._mark_failed(instance, e)
+                last_error = e
+            finally:
+                with self._lock:
+                    instance.in_flight -= 1
+        raise last_error
+
+    def _mark_failed(self, instance, error):
+        with self._lock:
+            instance.failures += 1
+            was_healthy = instance.healthy
+            instance.healthy = False
+        if was_healthy:
+            print(f"VOICEVOX {instance.client.base_url} unavailable: {error}")
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.health_interval):
+            for instance in self.instances:
+                self._probe(instance)
+
+    def _probe(self, instance):
+        version = instance.client.get_version()
+        with self._lock:
+            was_healthy = instance.healthy
+            instance.healthy = version is not None
+            instance.version = version
+            instance.last_probe = time.monotonic()
+        if instance.healthy and not was_healthy:
+            print(f"VOICEVOX {instance.client.base_url} is back")
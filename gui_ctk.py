@@ -1,9 +1,11 @@
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
 from audio_engine import VoiceVoxPlayer
+from chat_history import ChatHistoryView, ChatMessage
+from history_store import HistoryStore
+from speaker_catalog import SpeakerIndex
+from ui_assets import RenderedImageCache
 import threading
-import datetime
-from PIL import Image, ImageDraw
 import os
 import json
 
@@ -46,30 +48,50 @@ class VLiveCTKApp(ctk.CTk):
         self.title("VLive Controller")
         self.geometry("1050x700")
         
-        self.engine = VoiceVoxPlayer()
+        # Load Config
+        self.config = self._load_config()
+
+        self.engine = VoiceVoxPlayer(self.config["voicevox_url"], config=self.config)
+        self.engine.on_metrics = self._on_metrics
+        self.latency_text = ""
+        self._speculate_after = None
         self.devices = []
-        self.speakers = []
+        self.speaker_index = SpeakerIndex([])
+        self._speakers_warmed = False
         self.current_speaker_id = None
-        self.history_list = []
+        # Conversation history (SQLite), paged into the chat view
+        self.history = HistoryStore(self.config.get("history_db") or os.path.join(os.path.dirname(__file__), "asset", "history.db"))
+        self.history_page_size = int(self.config.get("history_page_size", 50))
+        self._oldest_loaded_id = None
+        self._history_exhausted = False
+        self._history_query = ""
         self.delete_mode = False
-        
-        # Load Config
-        self.config = self._load_config()
 
-        # Load Background
+        # Background and icons are drawn right after the first frame and
+        # cached as PNG, so the window shows without waiting for them
+        self.images = RenderedImageCache(os.path.join(self.engine.cache_dir, "ui"))
         self.bg_image = None
-        self._load_background()
-
-        # Generate Icons
-        self._create_icons()
+        self.icon_send = None
+        self.icon_stop = None
+        self._action_state = "send"
 
         self._init_ui()
         
         # Apply Config Defaults
         self._apply_config()
         
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # Startup Check
         self.after(100, self._startup_check)
+        # Idle first so the window has been drawn, then load images
+        self.after_idle(lambda: self.after(0, self._load_images))
+
+    def _on_close(self):
+        # Flushes usage counts and closes the audio stream before exiting
+        self.engine.close()
+        self.history.close()
+        self.destroy()
 
     def _load_config(self):
         config_path = os.path.join(os.path.dirname(__file__), "config.json")
@@ -89,39 +111,62 @@ class VLiveCTKApp(ctk.CTk):
                 print(f"Config load error: {e}")
         return default_config
 
+    def _load_images(self):
+        self._load_background()
+        self._create_icons()
+        if self.bg_image:
+            self.bg_label = ctk.CTkLabel(self, text="", image=self.bg_image)
+            self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+            self.bg_label.lower()
+        self._update_action_button(self._action_state)
+
     def _load_background(self):
         try:
             bg_path = os.path.join(os.path.dirname(__file__), "asset", "bg.png")
             if os.path.exists(bg_path):
-                pil_image = Image.open(bg_path)
+                # Stored at the window's scaling, so CTkImage does not resize it
+                scaling = ctk.ScalingTracker.get_window_scaling(self)
+                size = (round(1200 * scaling), round(800 * scaling))
+
+                def render():
+                    from PIL import Image
+                    return Image.open(bg_path).convert("RGB").resize(size, Image.LANCZOS)
+
+                key = {"path": bg_path, "mtime": os.path.getmtime(bg_path), "size": size}
+                pil_image = self.images.get("bg", key, render)
                 self.bg_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(1200, 800))
         except Exception as e:
             print(f"Failed to load background: {e}")
 
     def _create_icons(self):
-        # 1. Send Icon (Paper Plane)
         size = (40, 40)
-        send_img = Image.new("RGBA", size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(send_img)
-        # Draw a simple paper plane shape
-        # Points: Tip(35, 20), TailLeft(5, 5), TailCenter(10, 20), TailRight(5, 35)
-        points = [(35, 20), (5, 5), (10, 20), (5, 35)]
-        draw.polygon(points, fill=COLORS["send_icon"])
-        self.icon_send = ctk.CTkImage(light_image=send_img, dark_image=send_img, size=(25, 25))
 
-        # 2. Stop Icon (Square)
-        stop_img = Image.new("RGBA", size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(stop_img)
-        # Draw a rounded square
-        draw.rounded_rectangle((5, 5, 35, 35), radius=5, fill=COLORS["stop_icon"])
+        def render_send():
+            from PIL import Image, ImageDraw
+            # 1. Send Icon (Paper Plane)
+            send_img = Image.new("RGBA", size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(send_img)
+            # Draw a simple paper plane shape
+            # Points: Tip(35, 20), TailLeft(5, 5), TailCenter(10, 20), TailRight(5, 35)
+            points = [(35, 20), (5, 5), (10, 20), (5, 35)]
+            draw.polygon(points, fill=COLORS["send_icon"])
+            return send_img
+
+        def render_stop():
+            from PIL import Image, ImageDraw
+            # 2. Stop Icon (Square)
+            stop_img = Image.new("RGBA", size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(stop_img)
+            # Draw a rounded square
+            draw.rounded_rectangle((5, 5, 35, 35), radius=5, fill=COLORS["stop_icon"])
+            return stop_img
+
+        send_img = self.images.get("icon_send", {"color": COLORS["send_icon"], "size": size}, render_send)
+        self.icon_send = ctk.CTkImage(light_image=send_img, dark_image=send_img, size=(25, 25))
+        stop_img = self.images.get("icon_stop", {"color": COLORS["stop_icon"], "size": size}, render_stop)
         self.icon_stop = ctk.CTkImage(light_image=stop_img, dark_image=stop_img, size=(25, 25))
 
     def _init_ui(self):
-        # Background Label
-        if self.bg_image:
-            self.bg_label = ctk.CTkLabel(self, text="", image=self.bg_image)
-            self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-
         # Main Grid Layout
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -238,9 +283,16 @@ class VLiveCTKApp(ctk.CTk):
         self.left_col.grid_columnconfigure(0, weight=1)
 
         # Chat History (Scrollable)
-        self.chat_history_frame = ctk.CTkScrollableFrame(self.left_col, fg_color=COLORS["chat_bg"], corner_radius=20, label_text="トーク履歴", label_font=FONTS["bold"], label_fg_color=COLORS["transparent"], label_text_color=COLORS["white"])
-        self.chat_history_frame.grid(row=0, column=0, sticky="nsew", pady=(0, 0)) 
-        self.chat_history_frame.grid_columnconfigure(0, weight=1)
+        self.chat_view = ChatHistoryView(self.left_col, COLORS, FONTS, title="トーク履歴", pool_size=int(self.config.get("chat_pool_size", 30)))
+        self.chat_view.grid(row=0, column=0, sticky="nsew", pady=(0, 0))
+        self.chat_view.on_select = self._on_history_click
+        self.chat_view.on_need_older = self._load_older_history
+
+        self.history_search = ctk.CTkEntry(self.chat_view.header, placeholder_text="履歴を検索", width=180, height=28, font=FONTS["small"], fg_color="#FFFFFF", border_width=0, text_color=COLORS["text"])
+        self.history_search.pack(side="right")
+        self.history_search.bind("<Return>", self._search_history)
+        self.history_search.bind("<Escape>", self._clear_history_search)
+        self._load_older_history()
 
         # Input Area (Bottom) - Flat Bar style
         self.input_area = ctk.CTkFrame(self.left_col, fg_color=COLORS["input_bg"], corner_radius=0, height=70)
@@ -261,6 +313,7 @@ class VLiveCTKApp(ctk.CTk):
         )
         self.tts_entry.grid(row=0, column=0, padx=(15, 10), pady=15, sticky="ew")
         self.tts_entry.bind("<Return>", lambda e: self._speak())
+        self.tts_entry.bind("<KeyRelease>", self._on_draft_changed)
 
         # Toggle Button (Send / Stop)
         self.action_btn = ctk.CTkButton(
@@ -305,68 +358,104 @@ class VLiveCTKApp(ctk.CTk):
         self._on_voice_param_change(None) # Update labels and engine
 
     def _startup_check(self):
+        # Devices, apps and speakers load on worker threads; each part of the
+        # UI is filled in as soon as what it needs is ready
         self.now_playing_label.configure(text="アプリを確認中...")
-        
-        def ask_permission(app_name):
-            return messagebox.askyesno(
+        self._create_se_buttons()
+        # Last session's speakers, usable before VOICEVOX answers
+        cached = self.engine.get_cached_speakers()
+        if cached:
+            self._apply_speakers(cached)
+        self._speakers_requested = threading.Event()
+        threading.Thread(target=self._load_devices, daemon=True).start()
+        threading.Thread(target=self._run_startup_logic, args=(self._ask_permission,), daemon=True).start()
+
+    def _ask_permission(self, app_name):
+        # Called from the startup thread; the dialog must run on the Tk thread
+        answer = {}
+        done = threading.Event()
+
+        def ask():
+            answer["ok"] = messagebox.askyesno(
                 "アプリ起動", 
-                f"{app_name} が起動していません。\n起動しますか？\n(15秒ほどかかる場合があります)"
+                f"{app_name} が起動していません。\n起動しますか？"
             )
-        
-        threading.Thread(target=self._run_startup_logic, args=(ask_permission,), daemon=True).start()
+            done.set()
+
+        self.after(0, ask)
+        done.wait()
+        return answer["ok"]
 
     def _run_startup_logic(self, callback):
-        self.engine.check_and_launch_apps(callback)
-        self.after(0, self._load_data)
+        def on_ready(name):
+            if name == "VOICEVOX":
+                self._request_speakers()
 
-    def _load_data(self):
-        self.now_playing_label.configure(text="読み込み中...")
-        
-        # Load Devices
+        self.engine.check_and_launch_apps(callback, on_ready)
+        # Also reached when VOICEVOX never came up, to report the error
+        self._request_speakers()
+
+    def _request_speakers(self):
+        if not self._speakers_requested.is_set():
+            self.after(0, lambda: self.now_playing_label.configure(text="読み込み中..."))
+            self._speakers_requested.set()
+            threading.Thread(target=self._load_speakers, daemon=True).start()
+
+    def _load_devices(self):
         self.devices = self.engine.get_output_devices()
         device_names = [f"{d[1]} ({d[2]})" for d in self.devices]
-        
+        default_idx = 0
+        for i, name in enumerate(device_names):
+            if "Voicemeeter" in name:
+                default_idx = i
+                break
+        if device_names:
+            # Opening the stream can take a moment, so it happens here too
+            self.engine.set_output_device(self.devices[default_idx][0])
+        self.after(0, lambda: self._apply_devices(device_names, default_idx))
+
+    def _apply_devices(self, device_names, default_idx):
         if device_names:
             self.device_option.configure(values=device_names)
-            default_idx = 0
-            for i, name in enumerate(device_names):
-                if "Voicemeeter" in name:
-                    default_idx = i
-                    break
             self.device_option.set(device_names[default_idx])
-            self._on_device_change(device_names[default_idx])
         else:
             self.device_option.configure(values=["デバイスなし"])
 
-        # Load Speakers
-        speakers_data = self.engine.get_speakers()
-        self.speakers_map = {} 
-        speaker_names = []
+    def _load_speakers(self):
+        # Revalidates the cached catalogue; the menu is only rebuilt if it changed
+        speakers_data, changed = self.engine.refresh_speakers()
+        self.after(0, lambda: self._on_speakers_loaded(speakers_data, changed))
 
+    def _on_speakers_loaded(self, speakers_data, changed):
         if not speakers_data:
             self.now_playing_label.configure(text="Voicevox エラー")
             messagebox.showerror("接続エラー", "Voicevoxに接続できませんでした。")
-        else:
-            for sp in speakers_data:
-                name = sp['name']
-                for style in sp['styles']:
-                    full_name = f"{name} ({style['name']})"
-                    self.speakers_map[full_name] = style['id']
-                    speaker_names.append(full_name)
-            
-            self.speaker_option.configure(values=speaker_names)
-            if speaker_names:
-                # Try to find default from config
-                def_name = self.config["default_speaker_name"]
-                def_style = self.config["default_speaker_style"]
-                target = next((n for n in speaker_names if def_name in n and def_style in n), speaker_names[0])
-                
-                self.speaker_option.set(target)
-                self._on_speaker_change(target)
-                self.now_playing_label.configure(text="準備完了")
-
-        # Load SE
-        self._create_se_buttons()
+            return
+        if changed or not self.speaker_index.labels:
+            self._apply_speakers(speakers_data)
+        if not self._speakers_warmed:
+            # Models are only loaded once VOICEVOX answers
+            self._speakers_warmed = True
+            self.engine.warm_speaker(self.current_speaker_id)
+            self.engine.warm_top_speakers(int(self.config.get("warm_top_speakers", 0)))
+        self.now_playing_label.configure(text="準備完了")
+
+    def _apply_speakers(self, speakers_data):
+        index = SpeakerIndex(speakers_data)
+        if not index.labels:
+            return
+        self.speaker_index = index
+        self.speaker_option.configure(values=index.labels)
+
+        # Keep the current choice if it still exists, else the configured default
+        target = self.speaker_option.get()
+        if target not in index.by_label:
+            target = index.find(self.config["default_speaker_name"], self.config["default_speaker_style"]) or index.labels[0]
+        self.speaker_option.set(target)
+        if self.current_speaker_id != index.by_label[target]:
+            self.current_speaker_id = index.by_label[target]
+            if self._speakers_warmed:
+                self.engine.warm_speaker(self.current_speaker_id)
 
     def _create_se_buttons(self):
         for widget in self.se_scroll.winfo_children():
@@ -393,8 +482,9 @@ class VLiveCTKApp(ctk.CTk):
                 break
 
     def _on_speaker_change(self, choice):
-        if choice in self.speakers_map:
-            self.current_speaker_id = self.speakers_map[choice]
+        if choice in self.speaker_index.by_label:
+            self.current_speaker_id = self.speaker_index.by_label[choice]
+            self.engine.warm_speaker(self.current_speaker_id)
 
     def _on_voice_param_change(self, value):
         speed = self.speed_slider.get()
@@ -409,40 +499,120 @@ class VLiveCTKApp(ctk.CTk):
         self.volume_val_label.configure(text=f"{volume:.2f}")
         self.pitch_val_label.configure(text=f"{pitch:.2f}")
 
-    def _add_chat_bubble(self, text, is_se=False):
-        # Create a frame for the bubble row
-        row_frame = ctk.CTkFrame(self.chat_history_frame, fg_color="transparent")
-        row_frame.pack(fill="x", pady=5, padx=10)
-        
-        time_str = datetime.datetime.now().strftime("%H:%M:%S")
-        
-        if is_se:
-            # SE Bubble (Left Aligned, Grey)
-            bubble = ctk.CTkFrame(row_frame, fg_color=COLORS["bubble_se"], corner_radius=15)
-            bubble.pack(side="left", anchor="w")
-            
-            ctk.CTkLabel(bubble, text=f"♪ {text}", font=FONTS["chat"], text_color=COLORS["text"]).pack(padx=10, pady=5)
-            ctk.CTkLabel(row_frame, text=time_str, font=("Yu Gothic UI", 10), text_color="white").pack(side="left", anchor="w", padx=5, pady=(10,0))
-            
-        else:
-            # User Speech Bubble (Right Aligned, Green)
-            # Time first (on the left of the bubble)
-            ctk.CTkLabel(row_frame, text=time_str, font=("Yu Gothic UI", 10), text_color="white").pack(side="right", anchor="e", padx=5, pady=(10,0))
-            
-            bubble = ctk.CTkFrame(row_frame, fg_color=COLORS["bubble_user"], corner_radius=15)
-            bubble.pack(side="right", anchor="e")
-            
-            # Wrap text if too long
-            ctk.CTkLabel(bubble, text=text, font=FONTS["chat"], text_color=COLORS["text"], wraplength=300, justify="left").pack(padx=10, pady=5)
-
-        # Scroll to bottom (simple hack: update idle tasks then scroll)
-        self.chat_history_frame.update_idletasks()
-        self.chat_history_frame._parent_canvas.yview_moveto(1.0)
-        
+    def _add_chat_bubble(self, text, is_se=False, message_id=None):
+        if self._history_query:
+            self._clear_history_search()
+        # Drawn with the next frame; the view keeps a fixed number of widgets
+        message = self.chat_view.append(text, is_se, message_id)
+
         # Console Log
-        print(f"[{time_str}] {text}")
+        print(f"[{message.time_str}] {text}")
 
 
+    @staticmethod
+    def _to_chat_message(entry):
+        return ChatMessage(entry["text"], entry["is_se"], entry["timestamp"], entry["id"])
+
+    def _load_older_history(self):
+        if self._history_exhausted or self._history_query:
+            return
+        rows = self.history.page(self._oldest_loaded_id, self.history_page_size)
+        if len(rows) < self.history_page_size:
+            self._history_exhausted = True
+        if rows:
+            self._oldest_loaded_id = rows[-1]["id"]
+            self.chat_view.prepend([self._to_chat_message(row) for row in reversed(rows)])
+
+    def _search_history(self, event=None):
+        query = self.history_search.get().strip()
+        if not query:
+            self._clear_history_search()
+            return
+        self._history_query = query
+        rows = self.history.search(query)
+        self.chat_view.load([self._to_chat_message(row) for row in reversed(rows)])
+        self.now_playing_label.configure(text=f"検索結果: {len(rows)}件")
+
+    def _clear_history_search(self, event=None):
+        if event is not None:
+            self.history_search.delete(0, "end")
+        if not self._history_query:
+            return
+        # Back to the latest page of the full history
+        self._history_query = ""
+        self._oldest_loaded_id = None
+        self._history_exhausted = False
+        self.chat_view.clear()
+        self._load_older_history()
+
+    def _on_history_click(self, message):
+        # Replays a past line from its stored PCM; VOICEVOX is only asked
+        # again if the audio has since been evicted from the cache
+        if message.id is None:
+            return
+        entry = self.history.get(message.id)
+        if entry is None:
+            return
+        text = entry["text"]
+        on_complete = lambda: self._set_status(self._ready_text(), False)
+        if entry["is_se"]:
+            self.engine.play_se(text, on_start=lambda: self._set_status(f"再生中: {text}", True), on_complete=on_complete)
+            return
+
+        on_start = lambda: self._set_status(f"再生中: {text[:20]}...", True)
+        if self.engine.replay(entry["audio_keys"], entry["sample_rate"], on_start=on_start, on_complete=on_complete) is not None:
+            return
+        if entry["speaker_id"] is None:
+            return
+        print(f"Audio for '{text[:20]}' is no longer cached, synthesizing again")
+        params = (
+            entry["speed"], entry["volume"], entry["pitch"], self.engine.output_sample_rate,
+            entry["pre_phoneme"], entry["post_phoneme"]
+        )
+        self.engine.speak(text, entry["speaker_id"], on_start=on_start, on_complete=on_complete, params=params)
+
+    def _on_metrics(self, record):
+        # Called from the playback thread once an utterance finished
+        if record["kind"] != "speech":
+            return
+        summary = self.engine.get_metrics_summary().get("ttfa_ms")
+        if summary:
+            self.latency_text = f"発声まで p50 {summary['p50']:.0f}ms / p95 {summary['p95']:.0f}ms / p99 {summary['p99']:.0f}ms"
+
+    def _ready_text(self):
+        details = []
+        if self.latency_text:
+            details.append(self.latency_text)
+        if self.engine.speculative_enabled:
+            stats = self.engine.get_speculation_stats()
+            if stats["hits"] + stats["misses"]:
+                details.append(f"先読み的中 {stats['hit_rate']:.0%}")
+        if details:
+            return f"準備完了  ({' / '.join(details)})"
+        return "準備完了"
+
+    def _on_draft_changed(self, event=None):
+        # Debounced: synthesize the draft once typing pauses
+        if not self.engine.speculative_enabled:
+            return
+        # The Return release arrives after _speak() has cleared the entry
+        if event is not None and event.keysym in ("Return", "KP_Enter"):
+            return
+        self._cancel_speculation_timer()
+        delay = int(self.config.get("speculative_delay_ms", 300))
+        self._speculate_after = self.after(delay, self._speculate_draft)
+
+    def _cancel_speculation_timer(self):
+        if self._speculate_after is not None:
+            self.after_cancel(self._speculate_after)
+            self._speculate_after = None
+
+    def _speculate_draft(self):
+        self._speculate_after = None
+        if self.current_speaker_id is None:
+            return
+        self.engine.speculate(self.tts_entry.get(), self.current_speaker_id)
+
     def _set_status(self, text, is_playing=True):
         self.now_playing_label.configure(text=text)
         if is_playing:
@@ -453,6 +623,7 @@ class VLiveCTKApp(ctk.CTk):
             self._update_action_button("send")
 
     def _update_action_button(self, state):
+        self._action_state = state
         if state == "send":
             self.action_btn.configure(image=self.icon_send, command=self._speak)
         elif state == "stop":
@@ -465,15 +636,20 @@ class VLiveCTKApp(ctk.CTk):
         
         if self.current_speaker_id is None:
             return
+        # A pending draft speculation would only see the cleared entry
+        self._cancel_speculation_timer()
 
-        self._add_chat_bubble(text, is_se=False)
+        params, audio_keys = self.engine.plan_speech(text, self.current_speaker_id)
+        message_id = self.history.add(text, False, self.current_speaker_id, self.speaker_option.get(), params, audio_keys)
+        self._add_chat_bubble(text, is_se=False, message_id=message_id)
         self.tts_entry.delete(0, "end")
         
         self.engine.speak(
             text, 
             self.current_speaker_id,
             on_start=lambda: self._set_status(f"発言中: {text[:20]}...", True),
-            on_complete=lambda: self._set_status("準備完了", False)
+            on_complete=lambda: self._set_status(self._ready_text(), False),
+            params=params
         )
 
     def _stop(self):
@@ -489,11 +665,11 @@ class VLiveCTKApp(ctk.CTk):
             self._play_se(name)
 
     def _play_se(self, name):
-        self._add_chat_bubble(name, is_se=True)
+        self._add_chat_bubble(name, is_se=True, message_id=self.history.add(name, is_se=True))
         self.engine.play_se(
             name,
             on_start=lambda: self._set_status(f"再生中: {name}", True),
-            on_complete=lambda: self._set_status("準備完了", False)
+            on_complete=lambda: self._set_status(self._ready_text(), False)
         )
 
     def _add_se(self):
@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import threading
+
+_COLUMNS = (
+    "id", "timestamp", "is_se", "text", "speaker_id", "speaker_name",
+    "speed", "volume", "pitch", "pre_phoneme", "post_phoneme", "sample_rate", "audio_keys"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    is_se INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL,
+    speaker_id INTEGER,
+    speaker_name TEXT,
+    speed REAL,
+    volume REAL,
+    pitch REAL,
+    pre_phoneme REAL,
+    post_phoneme REAL,
+    sample_rate INTEGER,
+    audio_keys TEXT
+);
+"""
+
+# Trigram tokens match any substring, which suits Japanese text without spaces
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    text, content='messages', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+class HistoryStore:
+    """Conversation history in SQLite.
+
+    Each row keeps what is needed to replay the line: speaker, voice
+    parameters and the synth cache keys of its rendered PCM (one per
+    segment, space separated) with their sample rate. Rows come back as
+    dicts, newest first, a page at a time. Search uses an FTS5 trigram
+    index, or LIKE when FTS5 is missing or the query is shorter than three
+    characters.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.fts_enabled = True
+        try:
+            self.conn.executescript(_FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            print(f"History search index unavailable, using LIKE: {e}")
+            self.fts_enabled = False
+        self.conn.commit()
+
+    def add(self, text, is_se=False, speaker_id=None, speaker_name=None, params=None, audio_keys=None, timestamp=None):
+        """Stores a line and returns its id. params is the engine's voice parameter tuple."""
+        speed = volume = pitch = pre = post = rate = None
+        if params is not None:
+            speed, volume, pitch, rate, pre, post = params
+        row = (
+            time.time() if timestamp is None else timestamp, int(bool(is_se)), text,
+            speaker_id, speaker_name, speed, volume, pitch, pre, post, rate,
+            " ".join(audio_keys) if audio_keys else None
+        )
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT INTO messages (timestamp, is_se, text, speaker_id, speaker_name, speed, volume, pitch,"
+                " pre_phoneme, post_phoneme, sample_rate, audio_keys) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+            self.conn.commit()
+            return cur.lastrowid
+
+    def get(self, message_id):
+        with self._lock:
+            row = self.conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM messages WHERE id = ?", (message_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def page(self, before_id=None, limit=50):
+        """Returns up to limit rows older than before_id (all rows if None), newest first."""
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM messages"
+        args = ()
+        if before_id is not None:
+            sql += " WHERE id < ?"
+            args = (before_id,)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self.conn.execute(sql, args + (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def search(self, query, limit=200):
+        """Returns rows whose text contains query, newest first."""
+        query = query.strip()
+        if not query:
+            return []
+        columns = ", ".join(f"m.{c}" for c in _COLUMNS)
+        if self.fts_enabled and len(query) >= 3:
+            # Quoted so the text is matched literally, not as FTS syntax
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql = (f"SELECT {columns} FROM messages_fts f JOIN messages m ON m.id = f.rowid"
+                   " WHERE messages_fts MATCH ? ORDER BY m.id DESC LIMIT ?")
+            args = (phrase, limit)
+        else:
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql = f"SELECT {columns} FROM messages m WHERE m.text LIKE ? ESCAPE '\\' ORDER BY m.id DESC LIMIT ?"
+            args = (f"%{escaped}%", limit)
+        with self._lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @staticmethod
+    def _to_dict(row):
+        entry = dict(zip(_COLUMNS, row))
+        entry["is_se"] = bool(entry["is_se"])
+        entry["audio_keys"] = entry["audio_keys"].split() if entry["audio_keys"] else []
+        return entry
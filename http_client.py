@@ -0,0 +1,330 @@
+import json
+import time
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+from metrics import LatencyHistogram
+from cancellation import SynthesisCancelled
+from backend import SynthesisBackend
+
+
+class VoiceVoxClient(SynthesisBackend):
+    """Pooled keep-alive HTTP client for a VOICEVOX engine (the "http" backend).
+
+    Transient 5xx responses and connection errors are retried with backoff.
+    Every request is timed per endpoint, split into time-to-headers and body
+    transfer. TCP connects are timed separately so connection setup cost can
+    be told apart from synthesis.
+
+    audio_query() and synthesis() accept a CancelScope; cancelling it shuts
+    down the socket of the in-flight request, whether it is still waiting for
+    the engine or already downloading the WAV.
+    """
+
+    name = "http"
+    supports_streaming = True
+
+    def __init__(self, base_url, pool_size=4, connect_timeout=2.0, read_timeout=30.0, retries=2, backoff=0.2):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        # Pools build connections from a subclass that reports connect() time
+        connection_cls = type("TimedHTTPConnection", (_TimedHTTPConnection,), {
+            "on_connect": staticmethod(self._on_connect),
+            "on_request": staticmethod(self._on_request)
+        })
+        pool_cls = type("TimedHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": connection_cls})
+        adapter.poolmanager.pool_classes_by_scheme = {**adapter.poolmanager.pool_classes_by_scheme, "http": pool_cls}
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.histograms = {}
+        self.connection_stats = {"requests": 0, "new_connections": 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, base_url, config):
+        return cls(
+            base_url,
+            pool_size=int(config.get("http_pool_size", 4)),
+            connect_timeout=float(config.get("http_connect_timeout", 2.0)),
+            read_timeout=float(config.get("http_read_timeout", 30.0)),
+            retries=int(config.get("http_retries", 2)),
+            backoff=float(config.get("http_backoff", 0.2))
+        )
+
+    def get_speakers(self):
+        """Fetches available speakers, or [] if the engine is unreachable."""
+        try:
+            response = self._request("GET", "/speakers", read_timeout=5.0)
+            if response.status_code == 200:
+                return response.json()
+        except requests.RequestException:
+            pass
+        return []
+
+    def get_version(self):
+        """Returns the engine version string, or None if the engine is unreachable."""
+        try:
+            response = self._request("GET", "/version", read_timeout=2.0)
+            if response.status_code == 200:
+                return response.json()
+        except requests.RequestException:
+            pass
+        return None
+
+    def audio_query(self, text, speaker_id, scope=None):
+        """Returns the AudioQuery dict for text, or None on error."""
+        response = self._request("POST", "/audio_query", scope=scope, params={"text": text, "speaker": speaker_id})
+        if response.status_code != 200:
+            print(f"Voicevox Query Error: {response.text}")
+            return None
+        return response.json()
+
+    def synthesis(self, query, speaker_id, scope=None):
+        """Returns WAV bytes for an AudioQuery, or None on error."""
+        response = self._request(
+            "POST", "/synthesis",
+            scope=scope,
+            params={"speaker": speaker_id},
+            data=json.dumps(query),
+            headers={"Content-Type": "application/json"}
+        )
+        if response.status_code != 200:
+            print(f"Voicevox Synthesis Error: {response.text}")
+            return None
+        return response.content
+
+    def synthesis_stream(self, query, speaker_id, scope=None, chunk_size=16384):
+        """Starts /synthesis and returns a SynthesisStream over the WAV body, or None on error.
+
+        Returns once the response headers arrived; the body is read while
+        iterating, so decoding can begin before the download finished.
+        """
+        endpoint = "/synthesis"
+        connections, unregister = self._begin(scope, endpoint)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                "POST", f"{self.base_url}{endpoint}",
+                timeout=(self.connect_timeout, self.read_timeout),
+                stream=True,
+                params={"speaker": speaker_id},
+                data=json.dumps(query),
+                headers={"Content-Type": "application/json"}
+            )
+        except requests.RequestException:
+            unregister()
+            if scope is not None and scope.cancelled:
+                raise SynthesisCancelled(endpoint)
+            raise
+        finally:
+            # Connections were captured while sending; later requests on this thread are separate
+            self._local.connections = None
+            self._local.scope = None
+        connect_ms = self._local.connect_ms
+
+        if response.status_code != 200:
+            unregister()
+            print(f"Voicevox Synthesis Error: {response.text}")
+            response.close()
+            return None
+
+        def finish(completed):
+            unregister()
+            if completed:
+                total_ms = (time.perf_counter() - start) * 1000.0
+                self._record(endpoint, total_ms, response.elapsed.total_seconds() * 1000.0, connect_ms)
+
+        return SynthesisStream(response, chunk_size, scope, finish)
+
+    def initialize_speaker(self, speaker_id, skip_reinit=True):
+        """Asks the engine to load a speaker's model. Returns True on success."""
+        response = self._request(
+            "POST", "/initialize_speaker",
+            params={"speaker": speaker_id, "skip_reinit": "true" if skip_reinit else "false"}
+        )
+        if response.status_code not in (200, 204):
+            print(f"Voicevox Initialize Error: {response.text}")
+            return False
+        return True
+
+    def is_initialized_speaker(self, speaker_id):
+        """Returns whether the speaker's model is loaded, or None if unknown."""
+        response = self._request("GET", "/is_initialized_speaker", read_timeout=5.0, params={"speaker": speaker_id})
+        if response.status_code != 200:
+            return None
+        return bool(response.json())
+
+    def latency_summary(self):
+        """Returns {histogram name: summary} for every endpoint seen so far."""
+        with self._lock:
+            histograms = dict(self.histograms)
+            stats = dict(self.connection_stats)
+        summary = {name: h.summary() for name, h in sorted(histograms.items())}
+        summary["connections"] = stats
+        return summary
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, endpoint, read_timeout=None, scope=None, **kwargs):
+        url = f"{self.base_url}{endpoint}"
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        connections, unregister = self._begin(scope, endpoint)
+
+        try:
+            start = time.perf_counter()
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+            # Touch the body so transfer time is included
+            response.content
+            total_ms = (time.perf_counter() - start) * 1000.0
+        except requests.RequestException:
+            if scope is not None and scope.cancelled:
+                raise SynthesisCancelled(endpoint)
+            raise
+        finally:
+            self._local.connections = None
+            self._local.scope = None
+            unregister()
+        if scope is not None:
+            scope.check(endpoint)
+
+        headers_ms = response.elapsed.total_seconds() * 1000.0
+        self._record(endpoint, total_ms, headers_ms, self._local.connect_ms)
+        return response
+
+    def _begin(self, scope, endpoint):
+        """Prepares per-request state; returns (connections, unregister)."""
+        self._local.connect_ms = None
+        # Connections used by this request, filled in by _on_request
+        connections = self._local.connections = []
+        self._local.scope = scope
+        if scope is None:
+            return connections, lambda: None
+        scope.check(endpoint)
+        return connections, scope.add_callback(lambda: self._abort(connections))
+
+    def _on_request(self, connection):
+        # Runs on the requesting thread once the request has been sent
+        connections = getattr(self._local, "connections", None)
+        if connections is not None:
+            connections.append(connection)
+            scope = getattr(self._local, "scope", None)
+            if scope is not None and scope.cancelled:
+                self._abort([connection])
+
+    def _abort(self, connections):
+        for connection in list(connections):
+            sock = getattr(connection, "sock", None)
+            if sock is None:
+                continue
+            try:
+                # Unblocks the reader; the pool discards the broken connection
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _on_connect(self, ms):
+        # connect() runs on the requesting thread
+        self._local.connect_ms = (getattr(self._local, "connect_ms", None) or 0.0) + ms
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def _record(self, endpoint, total_ms, headers_ms, connect_ms):
+        with self._lock:
+            self.connection_stats["requests"] += 1
+            if connect_ms is not None:
+                self.connection_stats["new_connections"] += 1
+                connect = self._histogram("connect")
+            total = self._histogram(endpoint)
+            headers = self._histogram(f"{endpoint} headers")
+            body = self._histogram(f"{endpoint} body")
+        if connect_ms is not None:
+            connect.record(connect_ms)
+        total.record(total_ms)
+        headers.record(headers_ms)
+        body.record(max(0.0, total_ms - headers_ms))
+
+
+class SynthesisStream:
+    """Iterates over the body of a streamed /synthesis response.
+
+    Cancelling the scope aborts the download; iteration then raises
+    SynthesisCancelled. close() releases the connection and may be called
+    from any thread, before or during iteration.
+    """
+
+    def __init__(self, response, chunk_size, scope, finish):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.scope = scope
+        self._finish = finish
+        self._closed = False
+
+    def __iter__(self):
+        completed = False
+        try:
+            for chunk in self.response.iter_content(self.chunk_size):
+                if chunk:
+                    yield chunk
+            completed = True
+        except Exception:
+            if (self.scope is not None and self.scope.cancelled) or self._closed:
+                raise SynthesisCancelled("/synthesis")
+            raise
+        finally:
+            self._close(completed)
+        if self.scope is not None:
+            self.scope.check("/synthesis")
+
+    def close(self):
+        self._close(False)
+
+    def _close(self, completed):
+        if self._closed:
+            return
+        self._closed = True
+        self.response.close()
+        self._finish(completed)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    on_connect = None
+    on_request = None
+
+    def request(self, *args, **kwargs):
+        result = super().request(*args, **kwargs)
+        if self.on_request is not None:
+            self.on_request(self)
+        return result
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        if self.on_connect is not None:
+            self.on_connect((time.perf_counter() - start) * 1000.0)
@@ -0,0 +1,163 @@
+import os
+import math
+import json
+import time
+import threading
+from collections import deque
+
+
+class LatencyHistogram:
+    """Log-spaced latency histogram in milliseconds with percentile estimates."""
+
+    BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, ms):
+        index = len(self.BOUNDS_MS)
+        for i, bound in enumerate(self.BOUNDS_MS):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        """Estimates the q-th percentile (0-100) by interpolating inside a bucket."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q / 100.0 * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                if n and seen + n >= rank:
+                    lower = self.BOUNDS_MS[i - 1] if i > 0 else 0.0
+                    upper = self.BOUNDS_MS[i] if i < len(self.BOUNDS_MS) else self.max_ms
+                    upper = min(upper, self.max_ms)
+                    return lower + (upper - lower) * (rank - seen) / n
+                seen += n
+            return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+class UtteranceMetrics:
+    """Monotonic timestamps of one utterance as it moves through the pipeline."""
+
+    STAGES = (
+        "enqueue", "query_done", "synthesis_done", "decode_done",
+        "resample_done", "first_sample", "playback_end",
+    )
+
+    def __init__(self, kind, text="", speaker_id=None):
+        self.kind = kind
+        self.text_length = len(text)
+        self.speaker_id = speaker_id
+        self.audio_seconds = 0.0
+        self.cache_hit = False
+        self.speculative_hit = False
+        self.status = "done"
+        self.times = {}
+        self.mark("enqueue")
+
+    def mark(self, stage, t=None):
+        """Records a stage once; later marks of the same stage are ignored."""
+        if stage not in self.times:
+            self.times[stage] = time.monotonic() if t is None else t
+
+    def to_record(self):
+        start = self.times["enqueue"]
+        record = {
+            "time": time.time(),
+            "kind": self.kind,
+            "speaker_id": self.speaker_id,
+            "status": self.status,
+            "cache_hit": self.cache_hit,
+            "speculative_hit": self.speculative_hit,
+            "text_length": self.text_length,
+            "audio_seconds": round(self.audio_seconds, 3),
+        }
+        for stage in self.STAGES[1:]:
+            if stage in self.times:
+                record[f"{stage}_ms"] = round((self.times[stage] - start) * 1000.0, 2)
+        if "first_sample" in self.times:
+            record["ttfa_ms"] = record["first_sample_ms"]
+        if "playback_end" in self.times:
+            record["total_ms"] = record["playback_end_ms"]
+        return record
+
+
+class MetricsRecorder:
+    """Keeps recent utterance records for percentiles and appends them to a rolling JSONL file."""
+
+    def __init__(self, log_path=None, max_bytes=1024 * 1024, backups=3, window=500):
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, metrics):
+        """Stores a finished UtteranceMetrics and returns its record dict."""
+        record = metrics.to_record()
+        with self._lock:
+            self._recent.append(record)
+            if self.log_path:
+                self._write(record)
+        return record
+
+    def summary(self, fields=("ttfa_ms", "total_ms"), kind=None):
+        """Returns {field: {count, p50, p95, p99}} over the recent window."""
+        with self._lock:
+            records = [r for r in self._recent if kind is None or r["kind"] == kind]
+        result = {}
+        for field in fields:
+            values = sorted(r[field] for r in records if field in r)
+            if not values:
+                continue
+            result[field] = {
+                "count": len(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+            }
+        return result
+
+    def _write(self, record):
+        # Caller holds the lock
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.max_bytes:
+                self._rotate()
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"Error writing metrics: {e}")
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.log_path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.log_path}.{i + 1}")
+        os.replace(self.log_path, f"{self.log_path}.1")
+
+
+def _percentile(sorted_values, q):
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
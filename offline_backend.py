@@ -0,0 +1,121 @@
+import io
+import time
+import wave
+import zlib
+
+import numpy as np
+
+from backend import SynthesisBackend
+
+SPEAKERS = [
+    {
+        "name": "ずんだもん",
+        "speaker_uuid": "offline-zundamon",
+        "styles": [{"name": "ノーマル", "id": 3}, {"name": "あまあま", "id": 1}, {"name": "ツンツン", "id": 7}],
+        "version": "offline",
+    },
+    {
+        "name": "四国めたん",
+        "speaker_uuid": "offline-metan",
+        "styles": [{"name": "ノーマル", "id": 2}, {"name": "あまあま", "id": 0}],
+        "version": "offline",
+    },
+]
+
+
+class OfflineBackend(SynthesisBackend):
+    """Deterministic stand-in that renders tones locally instead of speech.
+
+    Each character of the text becomes one mora with a fixed pitch derived
+    from the character, so the same input always gives the same audio. The
+    AudioQuery parameters (speed, pitch, volume, pre/post silence, output
+    rate) behave as they do in VOICEVOX. Lets the pipeline and the GUI run,
+    and be benchmarked, without an engine; `delay` simulates engine time per
+    second of generated audio.
+    """
+
+    name = "offline"
+
+    def __init__(self, rate=24000, mora_seconds=0.12, delay=0.0):
+        self.rate = rate
+        self.mora_seconds = mora_seconds
+        self.delay = delay
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(delay=float(config.get("offline_delay", 0.0)))
+
+    def get_speakers(self):
+        return [dict(sp, styles=[dict(s) for s in sp["styles"]]) for sp in SPEAKERS]
+
+    def get_version(self):
+        return "offline"
+
+    def audio_query(self, text, speaker_id, scope=None):
+        if scope is not None:
+            scope.check("/audio_query")
+        moras = []
+        for ch in text:
+            if ch.isspace():
+                continue
+            code = zlib.crc32(f"{speaker_id}:{ch}".encode("utf-8"))
+            moras.append({
+                "text": ch,
+                "consonant": None,
+                "consonant_length": None,
+                "vowel": "a",
+                "vowel_length": self.mora_seconds,
+                "pitch": 5.0 + (code % 100) / 100.0,
+            })
+        return {
+            "accent_phrases": [{"moras": moras, "accent": 1, "pause_mora": None, "is_interrogative": False}] if moras else [],
+            "speedScale": 1.0,
+            "pitchScale": 0.0,
+            "intonationScale": 1.0,
+            "volumeScale": 1.0,
+            "prePhonemeLength": 0.1,
+            "postPhonemeLength": 0.1,
+            "outputSamplingRate": self.rate,
+            "outputStereo": False,
+            "kana": text,
+        }
+
+    def synthesis(self, query, speaker_id, scope=None):
+        rate = int(query.get("outputSamplingRate", self.rate))
+        speed = max(0.1, float(query.get("speedScale", 1.0)))
+        pitch_shift = float(query.get("pitchScale", 0.0))
+        volume = float(query.get("volumeScale", 1.0))
+
+        parts = [np.zeros(int(rate * query.get("prePhonemeLength", 0.1)), dtype=np.float32)]
+        for phrase in query.get("accent_phrases", []):
+            for mora in phrase["moras"]:
+                n = int(rate * (mora.get("vowel_length") or self.mora_seconds) / speed)
+                # VOICEVOX pitch is log-Hz; 5.0 is about 150 Hz
+                freq = float(np.exp(mora["pitch"] + pitch_shift))
+                t = np.arange(n, dtype=np.float32) / rate
+                envelope = np.minimum(1.0, np.minimum(t, t[::-1]) * 200.0) if n else t
+                parts.append(np.sin(2 * np.pi * freq * t) * envelope * 0.25 * volume)
+        parts.append(np.zeros(int(rate * query.get("postPhonemeLength", 0.1)), dtype=np.float32))
+        audio = np.concatenate(parts)
+
+        if self.delay > 0:
+            # Simulated engine time, interruptible like a real request
+            deadline = time.monotonic() + self.delay * len(audio) / rate
+            while time.monotonic() < deadline:
+                if scope is not None:
+                    scope.check("/synthesis")
+                time.sleep(min(0.01, max(0.0, deadline - time.monotonic())))
+        if scope is not None:
+            scope.check("/synthesis")
+
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        channels = 2 if query.get("outputStereo") else 1
+        if channels == 2:
+            pcm = np.repeat(pcm, 2)
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(pcm.tobytes())
+        return buf.getvalue()
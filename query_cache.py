@@ -0,0 +1,108 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """LRU cache of VOICEVOX AudioQuery results keyed by (text, speaker_id, engine).
+
+    Speed, volume and pitch are applied to the query afterwards, so one
+    entry serves every slider setting. With a path the cache is saved as
+    JSON a few seconds after it changes and reloaded on start. engine
+    identifies the backend and its version, so readings from another
+    engine are never reused.
+    """
+
+    def __init__(self, path=None, max_entries=512, save_delay=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+        if self.path:
+            self._load()
+
+    @staticmethod
+    def _key(text, speaker_id, engine):
+        return f"{engine}/{speaker_id}:{text}"
+
+    def get(self, text, speaker_id, engine=""):
+        """Returns a copy of the cached query (safe to modify), or None."""
+        key = self._key(text, speaker_id, engine)
+        with self._lock:
+            query = self._entries.get(key)
+            if query is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Only top-level fields are changed per synthesis
+        return dict(query)
+
+    def put(self, text, speaker_id, query, engine=""):
+        key = self._key(text, speaker_id, engine)
+        with self._lock:
+            self._entries[key] = dict(query)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._schedule_save()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._save_timer = None
+            data = list(self._entries.items())
+        tmp_path = f"{self.path}.tmp"
+        # The timer thread and flush() may both get here
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving query cache: {e}")
+
+    def flush(self):
+        """Writes pending changes now instead of waiting for the save timer."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+
+    def _schedule_save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, query in data[-self.max_entries:]:
+                self._entries[key] = query
+        except Exception as e:
+            print(f"Error loading query cache: {e}")
@@ -0,0 +1,209 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def design_filter(up, down, half_len_per_rate=10, beta=5.0):
+    """Kaiser-windowed sinc low-pass for up/down resampling.
+
+    Same design as scipy.signal.resample_poly's default, scaled by `up` to make
+    up for zero insertion. Returns (taps, half_len).
+    """
+    max_rate = max(up, down)
+    cutoff = 1.0 / max_rate
+    half_len = half_len_per_rate * max_rate
+    n = np.arange(2 * half_len + 1) - half_len
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(2 * half_len + 1, beta)
+    h *= up / h.sum()
+    return h.astype(np.float32), half_len
+
+
+class PolyphaseResampler:
+    """Rational-ratio polyphase resampler with a precomputed filter bank."""
+
+    def __init__(self, in_rate, out_rate):
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+
+        h, half_len = design_filter(self.up, self.down)
+        # Pre-pad so the group delay is a whole number of output samples
+        n_pre_pad = (self.down - half_len % self.down) % self.down
+        # Post-pad to a multiple of `up` for the polyphase split
+        n_taps = n_pre_pad + len(h)
+        n_post_pad = (-n_taps) % self.up
+        self.h = np.concatenate([
+            np.zeros(n_pre_pad, dtype=np.float32), h, np.zeros(n_post_pad, dtype=np.float32)
+        ])
+        # phases[p, j] == h[p + j * up]
+        self.phases = np.ascontiguousarray(self.h.reshape(-1, self.up).T)
+        # kernel[j, p] == phases[p, taps - 1 - j], for window @ kernel products
+        self._kernel = np.ascontiguousarray(self.phases[:, ::-1].T)
+        self.delay = (half_len + n_pre_pad) // self.down
+
+    def output_length(self, n):
+        return -(-n * self.up // self.down)
+
+    def process(self, audio, out=None):
+        """Resamples a (frames, channels) array; returns float32 (frames', channels).
+
+        `out` may be a preallocated C-contiguous float32 buffer of the right shape.
+        int16 input is converted while it is copied into the filter buffer, so
+        no separate float copy of the input is made.
+        """
+        x = np.asarray(audio)
+        if x.ndim == 1:
+            x = x.reshape(-1, 1)
+        n_out = self.output_length(len(x))
+        if out is None or not out.flags.c_contiguous:
+            out = np.empty((n_out, x.shape[1]), dtype=np.float32)
+
+        if self.up == self.down:
+            out[:] = x
+        elif self.down == 1:
+            self._upsample_integer(x, out)
+        else:
+            self._polyphase(x, out)
+        return out
+
+    def _upsample_integer(self, x, out, block=16384):
+        # Integer ratios (e.g. 24 kHz -> 48 kHz): each input frame yields `up`
+        # outputs, computed as one small matrix product per block
+        up = self.up
+        taps = self.phases.shape[1]
+        n = len(x)
+        # delay is 10 * up here, i.e. a whole number of input frames
+        offset = self.delay // up
+        padded = np.zeros(taps - 1 + n + offset, dtype=np.float32)
+        for c in range(x.shape[1]):
+            # The zero margins stay untouched, only the signal part is overwritten
+            padded[taps - 1:taps - 1 + n] = x[:, c]
+            # windows[k] == x[k - taps + 1 .. k]; a strided view, nothing is copied
+            windows = sliding_window_view(padded, taps)
+            dest = out[:, c].reshape(n, up)
+            for start in range(0, n, block):
+                end = min(start + block, n)
+                np.matmul(windows[offset + start:offset + end], self._kernel, out=dest[start:end])
+
+    def _polyphase(self, x, out):
+        # General rational ratios: outputs m, m + up, m + 2 * up, ... share one
+        # filter phase and read input windows `down` frames apart, so each
+        # phase is a single product over a strided view written straight into out
+        up, down = self.up, self.down
+        taps = self.phases.shape[1]
+        n = len(x)
+        n_out = len(out)
+        tail = self.delay * down // up + 2
+        padded = np.zeros(taps - 1 + n + tail, dtype=np.float32)
+        windows = sliding_window_view(padded, taps)
+        for c in range(x.shape[1]):
+            padded[taps - 1:taps - 1 + n] = x[:, c]
+            for r in range(min(up, n_out)):
+                i0, phase = divmod((r + self.delay) * down, up)
+                count = -(-(n_out - r) // up)
+                rows = windows[i0:i0 + (count - 1) * down + 1:down]
+                out[r::up, c] = rows @ self._kernel[:, phase]
+
+
+class StreamingResampler:
+    """Block-by-block version of PolyphaseResampler for audio that arrives in pieces.
+
+    The last taps-1 input frames are carried over between blocks, so the
+    concatenated output equals PolyphaseResampler.process() on the whole
+    signal. Call flush() after the last block to get the remaining frames.
+    """
+
+    def __init__(self, in_rate, out_rate, channels):
+        self.base = get_resampler(in_rate, out_rate)
+        self.channels = channels
+        self.taps = self.base.phases.shape[1]
+        self._history = np.zeros((self.taps - 1, channels), dtype=np.float32)
+        self._consumed = 0
+        self._produced = 0
+
+    def process(self, block):
+        """Feeds (frames, channels) input; returns the float32 output frames now complete."""
+        base = self.base
+        x = np.asarray(block, dtype=np.float32).reshape(-1, self.channels)
+        if base.up == base.down:
+            self._consumed += len(x)
+            self._produced += len(x)
+            return x
+
+        buf = np.concatenate([self._history, x])
+        buf_start = self._consumed - (self.taps - 1)
+        self._consumed += len(x)
+        self._history = buf[len(buf) - (self.taps - 1):]
+
+        # Output m needs input up to i0 = (m + delay) * down // up
+        end = -(-self._consumed * base.up // base.down) - base.delay
+        return self._compute(buf, buf_start, self._produced, max(self._produced, end))
+
+    def flush(self):
+        """Returns the final frames, treating the input after the last block as silence."""
+        base = self.base
+        total = base.output_length(self._consumed)
+        if base.up == base.down or self._produced >= total:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        pad = np.zeros((base.delay * base.down // base.up + self.taps, self.channels), dtype=np.float32)
+        out = self.process(pad)
+        remaining = total - (self._produced - len(out))
+        return out[:max(0, remaining)]
+
+    def process_int16(self, block):
+        return _to_int16(self.process(block))
+
+    def flush_int16(self):
+        return _to_int16(self.flush())
+
+    def _compute(self, buf, buf_start, start, end):
+        base = self.base
+        if end <= start:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        m = np.arange(start, end)
+        t = (m + base.delay) * base.down
+        i0 = t // base.up
+        phase = t % base.up
+        # windows[k, j] == x[i0[k] - j], read from the carried-over buffer
+        index = (i0 - buf_start)[:, None] - np.arange(self.taps)[None, :]
+        windows = buf[index]
+        out = np.einsum("kjc,kj->kc", windows, base.phases[phase])
+        self._produced = end
+        return out.astype(np.float32, copy=False)
+
+
+def _to_int16(audio):
+    np.clip(audio, -32768, 32767, out=audio)
+    return audio.astype(np.int16)
+
+
+@lru_cache(maxsize=16)
+def get_resampler(in_rate, out_rate):
+    """Returns the shared resampler for a rate pair (filters are built once)."""
+    return PolyphaseResampler(in_rate, out_rate)
+
+
+def resample_int16(audio, in_rate, out_rate, pool=None):
+    """Resamples int16 (frames, channels) PCM and returns int16.
+
+    With a BufferPool the float32 intermediate is a reused scratch buffer, so
+    the returned int16 array is the only new full-size allocation.
+    """
+    resampler = get_resampler(in_rate, out_rate)
+    if pool is None:
+        return _to_int16(resampler.process(audio))
+
+    channels = audio.shape[1] if audio.ndim == 2 else 1
+    scratch = pool.acquire(resampler.output_length(len(audio)), channels)
+    try:
+        out = resampler.process(audio, out=scratch)
+        np.clip(out, -32768, 32767, out=out)
+        result = np.empty(out.shape, dtype=np.int16)
+        np.copyto(result, out, casting="unsafe")
+    finally:
+        pool.release(scratch)
+    return result
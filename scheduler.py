@@ -0,0 +1,238 @@
+import itertools
+import threading
+import queue
+from collections import deque
+from concurrent.futures import Future
+
+from cancellation import CancelScope
+
+# Priority classes (lower runs first)
+PRIORITY_SE = 0
+PRIORITY_SPEECH = 10
+PRIORITY_SPECULATIVE = 15
+PRIORITY_BACKGROUND = 20
+
+# Submission modes
+MODE_INTERRUPT = "interrupt"   # cancel everything in the lane, then play
+MODE_ENQUEUE = "enqueue"       # play after what is already queued
+MODE_DROP = "drop"             # drop the new job if the lane is busy
+
+
+class PriorityWorkerPool:
+    """Fixed set of worker threads that run submitted calls by priority."""
+
+    def __init__(self, workers=2, name="worker"):
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, priority, fn, *args):
+        """Schedules fn(*args); returns a concurrent.futures.Future."""
+        future = Future()
+        self._queue.put((priority, next(self._seq), future, fn, args))
+        return future
+
+    def _worker(self):
+        while True:
+            _, _, future, fn, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class JobHandle:
+    """Handle for a scheduled utterance or SE; lets the caller cancel or await it."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    DROPPED = "dropped"
+    FAILED = "failed"
+
+    def __init__(self, lane, priority, play, prepare=None):
+        self.lane = lane
+        self.priority = priority
+        self.status = self.PENDING
+        self.result = None
+        self._play = play
+        self._prepare = prepare
+        self._future = None
+        self._prepared = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        # Shared with the synthesis so cancelling also aborts HTTP requests
+        self.scope = CancelScope()
+
+    @property
+    def cancelled(self):
+        return self.status in (self.CANCELLED, self.DROPPED)
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the job finished, was cancelled or dropped."""
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        """Cancels the job; a playing job is stopped. Returns False if already finished."""
+        with self._lock:
+            if self._done.is_set() or self.cancelled:
+                return False
+            was_running = self.status == self.RUNNING
+            self.status = self.CANCELLED
+        if self._future is not None:
+            self._future.cancel()
+        self.scope.cancel()
+        self._prepared.set()
+        # A playing job is finished by its lane once play() returns
+        if not was_running:
+            self._done.set()
+        return True
+
+    def add_cancel_callback(self, callback):
+        """Registers callback to run on cancel (immediately if already cancelled)."""
+        return self.scope.add_callback(callback)
+
+    def _start(self):
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.status = self.RUNNING
+            return True
+
+    def _finish(self, status):
+        with self._lock:
+            if not self.cancelled:
+                self.status = status
+        self._prepared.set()
+        self._done.set()
+
+
+class _Lane:
+    def __init__(self, name):
+        self.name = name
+        self.pending = deque()
+        self.current = None
+        self.cond = threading.Condition()
+        self.thread = None
+
+
+class UtteranceScheduler:
+    """Plays jobs in order per lane while preparing them on a shared worker pool.
+
+    Lanes (e.g. "speech" and "se") play independently of each other; within a
+    lane jobs play strictly in submission order, so a slow synthesis can never
+    start after a newer one.
+    """
+
+    def __init__(self, pool, max_pending=16):
+        self.pool = pool
+        self.max_pending = max_pending
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def submit(self, lane, play, prepare=None, priority=PRIORITY_SPEECH, mode=MODE_INTERRUPT):
+        """Queues a job. prepare(job) runs on the pool, then play(job, prepared) on the lane."""
+        job = JobHandle(lane, priority, play, prepare)
+        state = self._lane(lane)
+
+        with state.cond:
+            busy = state.current is not None or bool(state.pending)
+            if mode == MODE_DROP and busy:
+                job._finish(JobHandle.DROPPED)
+                return job
+            if mode == MODE_INTERRUPT:
+                self._cancel_lane_locked(state)
+            elif len(state.pending) >= self.max_pending:
+                job._finish(JobHandle.DROPPED)
+                return job
+
+            if prepare is not None:
+                job._future = self.pool.submit(priority, self._run_prepare, job)
+                job._future.add_done_callback(lambda _: job._prepared.set())
+            else:
+                job._prepared.set()
+
+            state.pending.append(job)
+            state.cond.notify()
+        return job
+
+    def cancel_lane(self, lane):
+        state = self._lanes.get(lane)
+        if state is not None:
+            with state.cond:
+                self._cancel_lane_locked(state)
+
+    def cancel_all(self):
+        for lane in list(self._lanes):
+            self.cancel_lane(lane)
+
+    def is_busy(self, lane=None):
+        if lane is not None:
+            states = [self._lanes[lane]] if lane in self._lanes else []
+        else:
+            states = list(self._lanes.values())
+        return any(state.current is not None or state.pending for state in states)
+
+    def _cancel_lane_locked(self, state):
+        for job in list(state.pending):
+            job.cancel()
+        state.pending.clear()
+        if state.current is not None:
+            state.current.cancel()
+
+    def _lane(self, name):
+        with self._lock:
+            state = self._lanes.get(name)
+            if state is None:
+                state = self._lanes[name] = _Lane(name)
+                state.thread = threading.Thread(target=self._run_lane, args=(state,), name=f"lane-{name}", daemon=True)
+                state.thread.start()
+            return state
+
+    def _run_prepare(self, job):
+        if job.cancelled:
+            return None
+        return job._prepare(job)
+
+    def _run_lane(self, state):
+        while True:
+            with state.cond:
+                while not state.pending:
+                    state.cond.wait()
+                job = state.pending.popleft()
+                state.current = job
+
+            try:
+                job._prepared.wait()
+                if job.cancelled:
+                    continue
+
+                prepared = None
+                if job._future is not None:
+                    try:
+                        prepared = job._future.result()
+                    except Exception as e:
+                        print(f"Error preparing {state.name}: {e}")
+
+                if not job._start():
+                    continue
+                job.result = prepared
+                job._play(job, prepared)
+                job._finish(JobHandle.DONE)
+            except Exception as e:
+                print(f"Error playing {state.name}: {e}")
+                job._finish(JobHandle.FAILED)
+            finally:
+                job._done.set()
+                with state.cond:
+                    state.current = None
@@ -0,0 +1,45 @@
+import numpy as np
+
+INT16_FULL_SCALE = 32768.0
+
+
+def find_voiced_range(audio, rate, threshold_db=-50.0, frame_ms=5.0):
+    """Returns (start, end) frame indices of the part of audio above threshold_db.
+
+    audio is int16 or float PCM shaped (frames, channels). Energy is measured
+    per frame_ms window over all channels at once. Returns (0, 0) for audio
+    that is silent throughout.
+    """
+    n = len(audio)
+    window = max(1, int(rate * frame_ms / 1000.0))
+    count = n // window
+    if count == 0:
+        return 0, n
+
+    scale = INT16_FULL_SCALE if audio.dtype == np.int16 else 1.0
+    blocks = audio[:count * window].reshape(count, -1)
+    # Mean square per window in float32, compared against the threshold in the power domain
+    power = np.einsum("ij,ij->i", blocks, blocks, dtype=np.float32) / (blocks.shape[1] * scale * scale)
+    limit = 10.0 ** (threshold_db / 10.0)
+    voiced = np.flatnonzero(power > limit)
+    if voiced.size == 0:
+        return 0, 0
+
+    start = voiced[0] * window
+    end = (voiced[-1] + 1) * window
+    # A partial window at the end belongs to the voiced range if the last full one did
+    if voiced[-1] == count - 1:
+        end = n
+    return start, end
+
+
+def trim_silence(audio, rate, threshold_db=-50.0, keep_ms=20.0, frame_ms=5.0):
+    """Cuts leading and trailing silence, keeping keep_ms on each side.
+
+    Returns a view into audio, so nothing is copied.
+    """
+    start, end = find_voiced_range(audio, rate, threshold_db, frame_ms)
+    if end <= start:
+        return audio[:0]
+    keep = int(rate * keep_ms / 1000.0)
+    return audio[max(0, start - keep):min(len(audio), end + keep)]
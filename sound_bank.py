@@ -0,0 +1,161 @@
+import os
+import json
+import glob
+import wave
+import hashlib
+import threading
+
+import numpy as np
+
+
+class SoundBank:
+    """Sound effects decoded and resampled once, kept as memory-mapped .npy files.
+
+    Each entry is rebuilt when its source WAV changes (mtime/size, then content
+    hash) or when the output rate changes.
+    """
+
+    def __init__(self, cache_dir, process_audio):
+        self.cache_dir = cache_dir
+        self.process_audio = process_audio
+        self.output_rate = None
+
+        self._sounds = {}
+        self._lock = threading.RLock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def load_all(self, se_map, output_rate):
+        """Prepares every entry of se_map for output_rate."""
+        with self._lock:
+            if output_rate != self.output_rate:
+                self._sounds.clear()
+            self.output_rate = output_rate
+            for name in list(self._sounds):
+                if name not in se_map:
+                    del self._sounds[name]
+            # Files of removed SEs that could not be deleted at the time
+            self._remove_orphans({self._entry_id(path) for path in se_map.values()})
+
+        for name, path in list(se_map.items()):
+            self.prepare(name, path)
+
+    def prepare(self, name, path):
+        """Returns the prepared PCM for an SE, building its cache file if stale."""
+        with self._lock:
+            if self.output_rate is None:
+                return None
+            try:
+                audio = self._load_or_build(path, self.output_rate)
+            except Exception as e:
+                print(f"Error preparing SE '{name}': {e}")
+                return None
+            self._sounds[name] = audio
+            return audio
+
+    def get(self, name):
+        return self._sounds.get(name)
+
+    def remove(self, name, path=None):
+        """Forgets an SE; with path, also deletes its cached files."""
+        with self._lock:
+            self._sounds.pop(name, None)
+            if path is not None:
+                self._delete_entry(self._entry_id(path))
+
+    def _delete_entry(self, entry_id):
+        paths = glob.glob(os.path.join(self.cache_dir, f"{entry_id}_*.npy"))
+        paths.append(os.path.join(self.cache_dir, f"{entry_id}.json"))
+        for path in paths:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                # Still mapped by a playing voice (Windows); cleaned up on the next load_all
+                pass
+
+    def _remove_orphans(self, keep_ids):
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith((".npy", ".json")):
+                continue
+            entry_id = filename.split("_", 1)[0].split(".", 1)[0]
+            if entry_id not in keep_ids:
+                self._delete_entry(entry_id)
+
+    def _entry_id(self, path):
+        return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+
+    def _load_or_build(self, path, output_rate):
+        entry_id = self._entry_id(path)
+        meta_path = os.path.join(self.cache_dir, f"{entry_id}.json")
+        st = os.stat(path)
+
+        meta = None
+        if os.path.exists(meta_path):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception:
+                meta = None
+
+        if meta and meta.get("output_rate") == output_rate:
+            npy_path = os.path.join(self.cache_dir, meta["file"])
+            if os.path.exists(npy_path):
+                fresh = meta.get("mtime") == st.st_mtime and meta.get("size") == st.st_size
+                if not fresh and meta.get("size") == st.st_size and meta.get("sha256") == self._hash_file(path):
+                    # Touched but unchanged: keep the cache, refresh the stamp
+                    meta["mtime"] = st.st_mtime
+                    self._write_meta(meta_path, meta)
+                    fresh = True
+                if fresh:
+                    return np.load(npy_path, mmap_mode="r")
+
+        return self._build(path, entry_id, meta_path, st, output_rate)
+
+    def _build(self, path, entry_id, meta_path, st, output_rate):
+        with wave.open(path, "rb") as wf:
+            rate = wf.getframerate()
+            channels = wf.getnchannels()
+            frames = wf.readframes(wf.getnframes())
+        audio = np.frombuffer(frames, dtype=np.int16)
+        audio = self.process_audio(audio, channels, rate, output_rate)
+
+        digest = self._hash_file(path)
+        # A new file name per version so a still-mapped old file is never overwritten
+        filename = f"{entry_id}_{output_rate}_{digest[:8]}.npy"
+        npy_path = os.path.join(self.cache_dir, filename)
+        tmp_path = f"{npy_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(audio))
+        os.replace(tmp_path, npy_path)
+
+        self._write_meta(meta_path, {
+            "source": os.path.abspath(path),
+            "file": filename,
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "sha256": digest,
+            "output_rate": output_rate,
+        })
+        self._remove_stale(entry_id, filename)
+        return np.load(npy_path, mmap_mode="r")
+
+    def _remove_stale(self, entry_id, keep):
+        for old_path in glob.glob(os.path.join(self.cache_dir, f"{entry_id}_*.npy")):
+            if os.path.basename(old_path) != keep:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    # Still mapped somewhere (Windows); retried on the next rebuild
+                    pass
+
+    def _write_meta(self, meta_path, meta):
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def _hash_file(self, path):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        return h.hexdigest()
@@ -0,0 +1,62 @@
+import os
+import json
+import threading
+
+
+class SpeakerIndex:
+    """Lookup tables for a /speakers result, built once per catalogue.
+
+    labels are the "name (style)" menu entries in engine order.
+    """
+
+    def __init__(self, speakers):
+        self.labels = []
+        self.by_label = {}
+        self.by_style = {}
+        self.label_by_id = {}
+        for sp in speakers:
+            for style in sp["styles"]:
+                label = f"{sp['name']} ({style['name']})"
+                self.labels.append(label)
+                self.by_label[label] = style["id"]
+                self.by_style[(sp["name"], style["name"])] = style["id"]
+                self.label_by_id.setdefault(style["id"], label)
+
+    def find(self, name, style):
+        """Returns the menu label for a speaker name and style, or None."""
+        speaker_id = self.by_style.get((name, style))
+        return self.label_by_id.get(speaker_id) if speaker_id is not None else None
+
+
+class SpeakerCatalog:
+    """The last /speakers result and engine /version, persisted as JSON.
+
+    Lets the speaker menu be filled at startup before the engine answers;
+    the caller revalidates against the engine and saves what it got.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Returns (version, speakers), or (None, None) when nothing is cached."""
+        if not os.path.exists(self.path):
+            return None, None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get("version"), data["speakers"]
+        except Exception as e:
+            print(f"Error loading speaker cache: {e}")
+            return None, None
+
+    def save(self, version, speakers):
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"version": version, "speakers": speakers}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving speaker cache: {e}")
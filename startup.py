@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import subprocess
+
+
+def list_process_names():
+    """Returns the lowercase executable names of all running processes.
+
+    One snapshot per call: a single tasklist run on Windows, a /proc scan
+    on Linux and ps elsewhere. Returns an empty set if listing fails.
+    """
+    try:
+        if sys.platform == "win32":
+            return _windows_processes()
+        if os.path.isdir("/proc"):
+            return _proc_processes()
+        output = subprocess.check_output(["ps", "-A", "-o", "comm="], text=True)
+        return {os.path.basename(line.strip()).lower() for line in output.splitlines() if line.strip()}
+    except Exception as e:
+        print(f"Could not list processes: {e}")
+        return set()
+
+
+def _windows_processes():
+    # CSV without header: "Image Name","PID",...
+    output = subprocess.check_output(
+        ["tasklist", "/fo", "csv", "/nh"],
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    ).decode("mbcs", errors="ignore")
+    names = set()
+    for line in output.splitlines():
+        if line.startswith('"'):
+            names.add(line[1:line.find('"', 1)].lower())
+    return names
+
+
+def _proc_processes():
+    names = set()
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            # comm is cut to 15 characters, so also take argv[0]
+            with open(f"/proc/{pid}/comm", "rb") as f:
+                names.add(f.read().decode("utf-8", errors="ignore").strip().lower())
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                argv0 = f.read().split(b"\0", 1)[0].decode("utf-8", errors="ignore")
+            if argv0:
+                # Windows paths too, for programs run under Wine
+                names.add(argv0.replace("\\", "/").rsplit("/", 1)[-1].lower())
+        except OSError:
+            # Process exited while scanning, or not ours to read
+            pass
+    return names
+
+
+def poll_until(check, timeout, interval=0.25, max_interval=2.0):
+    """Calls check() with exponential backoff until it returns True or timeout passes."""
+    deadline = time.monotonic() + timeout
+    while True:
+        if check():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
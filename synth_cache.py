@@ -0,0 +1,187 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SynthCache:
+    """Content-addressed cache of rendered speech PCM.
+
+    Entries live in an in-memory LRU bounded by a byte budget and are also
+    written to disk as .npy files so they survive restarts.
+    """
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024, disk_max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._disk_bytes = self._scan_disk()
+
+    @staticmethod
+    def make_key(*parts):
+        """Builds a stable key from the synthesis parameters."""
+        normalized = [round(p, 4) if isinstance(p, float) else p for p in parts]
+        raw = json.dumps(normalized, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached PCM for key, or None on a miss."""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        audio = self._load_from_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, audio)
+        return audio
+
+    def contains(self, key):
+        """True if key is in memory or on disk (does not count as a hit)."""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return os.path.exists(self._path(key))
+
+    def put(self, key, audio):
+        """Stores PCM under key in memory and on disk."""
+        if audio.base is not None:
+            # A view (e.g. trimmed silence) would keep its whole parent buffer
+            # alive while only its own nbytes count against max_bytes
+            audio = audio.copy()
+        audio = np.ascontiguousarray(audio)
+        audio.setflags(write=False)
+        with self._lock:
+            self._insert(key, audio)
+        self._save_to_disk(key, audio)
+
+    def clear(self):
+        """Drops the in-memory tier (disk entries are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _insert(self, key, audio):
+        # Caller holds the lock
+        if audio.nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = audio
+        self._bytes += audio.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _scan_disk(self):
+        total = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".npy"):
+                try:
+                    total += os.path.getsize(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    pass
+        return total
+
+    def _load_from_disk(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            audio = np.load(path)
+            audio.setflags(write=False)
+            # Touch so disk eviction stays least-recently-used
+            os.utime(path, None)
+            return audio
+        except Exception as e:
+            print(f"Error reading TTS cache: {e}")
+            return None
+
+    def _save_to_disk(self, key, audio):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, audio)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing TTS cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_bytes += os.path.getsize(path)
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".npy"):
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    st = os.stat(path)
+                    files.append((st.st_mtime, st.st_size, path))
+                except OSError:
+                    pass
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        # Trim to 90% so we don't rescan on every put
+        target = self.disk_max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.disk_evictions += 1
+            except OSError:
+                pass
+
+        with self._lock:
+            self._disk_bytes = total
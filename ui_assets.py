@@ -0,0 +1,39 @@
+import os
+import json
+import hashlib
+
+
+class RenderedImageCache:
+    """PNG cache for images the GUI draws or rescales at startup.
+
+    Each image is stored under a name plus a hash of what it was made
+    from (colors, sizes, source file mtime), so a change re-renders it and
+    later launches only decode a small PNG.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def get(self, name, key, render):
+        """Returns the PIL image for (name, key), calling render() on a miss."""
+        from PIL import Image
+
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        path = os.path.join(self.cache_dir, f"{name}-{digest}.png")
+        if os.path.exists(path):
+            try:
+                image = Image.open(path)
+                image.load()
+                return image
+            except Exception as e:
+                print(f"Error reading image cache: {e}")
+
+        image = render()
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing image cache: {e}")
+        return image
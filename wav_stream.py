@@ -0,0 +1,101 @@
+import struct
+
+import numpy as np
+
+
+def decode_wav(data):
+    """Parses a complete 16-bit PCM WAV held in memory.
+
+    Returns (audio, rate, channels) where audio is an int16 (frames, channels)
+    view into data, so the samples are not copied.
+    """
+    view = memoryview(data)
+    if len(view) < 12 or bytes(view[:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+        raise ValueError("not a WAV file")
+
+    rate = channels = None
+    pos = 12
+    while pos + 8 <= len(view):
+        chunk_id = bytes(view[pos:pos + 4])
+        size = struct.unpack_from("<I", view, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", view, body)
+            if fmt not in (1, 0xFFFE) or bits != 16:
+                raise ValueError(f"unsupported WAV format {fmt} / {bits} bit")
+        elif chunk_id == b"data":
+            if rate is None:
+                raise ValueError("WAV data before fmt chunk")
+            end = min(len(view), body + size)
+            frames = (end - body) // (channels * 2)
+            audio = np.frombuffer(view, dtype="<i2", count=frames * channels, offset=body)
+            return audio.reshape(-1, channels), rate, channels
+        pos = body + size + (size & 1)
+    raise ValueError("WAV without data chunk")
+
+
+class WavStreamParser:
+    """Incremental parser for a 16-bit PCM WAV file arriving in chunks.
+
+    feed() returns the complete frames received so far as an int16
+    (frames, channels) array, or None while the header is incomplete. The
+    RIFF and data sizes are not trusted, so streams with placeholder sizes
+    work as well.
+    """
+
+    def __init__(self):
+        self.rate = None
+        self.channels = None
+        self.bits = None
+        self._buffer = bytearray()
+        self._in_data = False
+        self._frame_bytes = 0
+
+    @property
+    def ready(self):
+        return self._in_data
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        if not self._in_data and not self._parse_header():
+            return None
+
+        usable = len(self._buffer) - len(self._buffer) % self._frame_bytes
+        if usable == 0:
+            return np.zeros((0, self.channels), dtype=np.int16)
+        frames = np.frombuffer(bytes(self._buffer[:usable]), dtype="<i2").reshape(-1, self.channels)
+        del self._buffer[:usable]
+        return frames
+
+    def _parse_header(self):
+        buf = self._buffer
+        if len(buf) < 12:
+            return False
+        if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+            raise ValueError("not a WAV stream")
+
+        pos = 12
+        while len(buf) >= pos + 8:
+            chunk_id = bytes(buf[pos:pos + 4])
+            size = struct.unpack_from("<I", buf, pos + 4)[0]
+            if chunk_id == b"data":
+                if self.rate is None:
+                    raise ValueError("WAV data before fmt chunk")
+                del buf[:pos + 8]
+                self._in_data = True
+                return True
+            # Other chunks are padded to an even length
+            end = pos + 8 + size + (size & 1)
+            if len(buf) < end:
+                return False
+            if chunk_id == b"fmt ":
+                fmt, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", buf, pos + 8)
+                # 0xFFFE is WAVE_FORMAT_EXTENSIBLE
+                if fmt not in (1, 0xFFFE) or bits != 16:
+                    raise ValueError(f"unsupported WAV format {fmt} / {bits} bit")
+                self.rate = rate
+                self.channels = channels
+                self.bits = bits
+                self._frame_bytes = channels * 2
+            pos = end
+        return False